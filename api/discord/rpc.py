@@ -1,8 +1,12 @@
 import datetime
 import logging
+import threading
+import time
 
-from api.lastfm.user.library import get_library_data
-from api.lastfm.user.profile import get_user_data
+from api.lastfm.user.library import get_artist_count, get_track_count
+from api.lastfm.user.profile import get_profile_cache
+from api.lastfm.user.counters import ScrobbleCounters
+from api.discord.send_queue import ActivitySendQueue
 
 from pypresence.presence import Presence
 from pypresence import exceptions
@@ -10,6 +14,9 @@ from pypresence.types import ActivityType, StatusDisplayType
 
 from utils.url_utils import url_encoder
 from utils.string_utils import messenger
+from utils.request_utils import fetch_concurrently
+from utils.metrics import get_metrics
+from utils.session_recorder import get_recorder
 from constants.project import (
     CLIENT_ID, 
     DAY_MODE_COVER, NIGHT_MODE_COVER,
@@ -21,13 +28,16 @@ from constants.project import (
 logger = logging.getLogger('rpc')
 
 class DiscordRPC:
-    def __init__(self):
+    def __init__(self, clock=time.time):
         """
         Initializes the DiscordRPC class.
         
         Sets up the state variables. The actual Presence object is initialized
-        when enable() is called.
+        when enable() is called. ``clock`` returns the current Unix time; it is
+        used for track timestamps, listen lengths and the day/night cover, so a
+        replay can run on recorded time.
         """
+        self.clock = clock
         self.RPC = None
         self._enabled = False
         self._disabled = True
@@ -57,6 +67,19 @@ class DiscordRPC:
         self.cached_user_data = None
         self.cached_library_data = None
 
+        # Locally maintained scrobble counters, fed by the engine's polls
+        self.counters = ScrobbleCounters()
+
+        # Last payload Discord accepted, to skip updates that change nothing
+        self.last_payload = None
+        self.updates_sent = 0
+        self.updates_skipped = 0
+
+        # Rate-limited sends may be flushed from the queue's timer thread, so
+        # every call on the Presence object goes through this lock
+        self._io_lock = threading.RLock()
+        self.send_queue = ActivitySendQueue(self._deliver)
+
     @property
     def is_connected(self):
         """Returns whether the RPC is currently connected and active."""
@@ -66,13 +89,20 @@ class DiscordRPC:
         """
         Establishes a connection to Discord.
         """
-        if not self._enabled:
+        # The state flags are checked and set under the lock: the send queue's
+        # timer thread may be disconnecting at the same time
+        with self._io_lock:
+            if self._enabled:
+                return
             try:
                 if self.RPC is None:
                     self.RPC = Presence(CLIENT_ID)
-                
+
                 self.RPC.connect()
-                self.connection_time = datetime.datetime.now()
+                self.last_payload = None # A new connection starts without an activity
+                self.send_queue.clear()
+                self.connection_time = datetime.datetime.fromtimestamp(self.clock())
+                get_metrics().inc("discord_connects_total")
                 logger.info('Connected with Discord')
                 self._enabled = True
                 self._disabled = False
@@ -87,9 +117,17 @@ class DiscordRPC:
         
         Clears the current RPC state, closes the connection, and updates state variables.
         """
-        if not self._disabled and self.RPC:
-            self.RPC.clear()  # Clear the current RPC state
-            self.RPC.close()  # Close the connection to Discord
+        with self._io_lock:
+            if self._disabled or not self.RPC:
+                return
+            self.send_queue.clear()
+            try:
+                self.RPC.clear()  # Clear the current RPC state
+                self.RPC.close()  # Close the connection to Discord
+            except Exception as e:
+                # Typically the pipe that made an update fail; the connection is gone either way
+                logger.debug(f'Error closing the Discord connection: {e}')
+            self.last_payload = None
             self.connection_time = None
             self.last_track = None # Reset so update triggers on reconnect
             self.current_artist = None
@@ -150,14 +188,17 @@ class DiscordRPC:
         
         # artwork
         if artwork is None:
-            # if there is no artwork, use the default one
-            now = datetime.datetime.now()
+            # end of the artwork chain (album, track, artist image): the theme cover
+            now = datetime.datetime.fromtimestamp(self.clock())
             #day: false, night: true
             is_day = now.hour >= 18 or now.hour < 9 
             artwork = DAY_MODE_COVER if is_day else NIGHT_MODE_COVER
             large_image_lines['theme'] = messenger('rpc_night_mode') if is_day else messenger('rpc_day_mode')
 
-        if artist_count:
+        if artist_count is None:
+            # the artist page could not be fetched, leave the line out
+            pass
+        elif artist_count:
             # if the artist is in the library
             if self.show_artist_scrobbles_large:
                 track_count = library_data["track_count"]
@@ -182,28 +223,42 @@ class DiscordRPC:
             {"label": "YouTube Music", "url": str(YT_MUSIC_SEARCH_TEMPLATE.format(query=url_encoder(album)))}
         ]
 
-    def update_status(self, track, title, artist, album, time_remaining, username, artwork, force=False):
+    def update_status(self, track, title, artist, album, time_remaining, username, artwork, force=False, cancelled=None):
+        """
+        Scrapes the stats for a track and queues its presence.
+
+        ``cancelled`` is a threading.Event the caller sets once this update is
+        superseded (newer track, tray change, disconnect); it is checked
+        before scraping and before anything is changed or sent, so stale
+        work never reaches Discord.
+        """
         if len(title) < 2:
             title = title + ' '
 
         if self.last_track == track and self.current_artist is not None and not force:
             return
+        if self._is_superseded(cancelled, track):
+            return
 
         time_remaining_bool = time_remaining > 0
         if time_remaining_bool:
             time_remaining = float(str(time_remaining)[0:3])
 
         user_data, library_data = self._get_metadata_with_cache(track, username, artist, title)
-        if not user_data or not library_data:
+        if user_data is None or library_data is None:
             return
 
-        # Only reset start_time if it's a new track
-        if self.last_track != track:
-            self.start_time = datetime.datetime.now().timestamp()
-            
-        self.last_track = track
-        self.current_artist = artist
-        self.artist_scrobbles = library_data["artist_count"]
+        # Under the I/O lock so a disconnect can't interleave with the state change
+        with self._io_lock:
+            if self._is_superseded(cancelled, track):
+                return
+            # Only reset start_time if it's a new track
+            if self.last_track != track:
+                self.start_time = self.clock()
+
+            self.last_track = track
+            self.current_artist = artist
+            self.artist_scrobbles = library_data["artist_count"]
 
         # Prepare Assets
         rpc_buttons = self._prepare_buttons(username, artist, title, album)
@@ -228,29 +283,64 @@ class DiscordRPC:
             'end': time_remaining + self.start_time if (time_remaining_bool and self.start_time is not None) else None
         }
 
+        if self._is_superseded(cancelled, track):
+            return
         self._send_rpc_update(update_assets)
 
+    @staticmethod
+    def _is_superseded(cancelled, track) -> bool:
+        if cancelled is not None and cancelled.is_set():
+            logger.debug(f"Dropped superseded presence update for {track}")
+            return True
+        return False
+
     def _get_metadata_with_cache(self, track, username, artist, title):
-        """Fetch user and library data with caching logic."""
+        """
+        Fetch user and library data with caching logic.
+
+        Library counts come from the persistent cache and the profile header
+        from the profile cache, which refreshes itself in the background; the
+        profile page is only fetched inline the very first time a user is
+        seen. Whatever must be fetched is requested concurrently; a page that
+        fails only leaves its own fields empty and the update is aborted only
+        when every page failed.
+        """
         if self.last_fetched_track == track and self.cached_user_data and self.cached_library_data:
             logger.debug(f"Using cached Last.fm stats for {track}")
             return self.cached_user_data, self.cached_library_data
 
-        user_data = get_user_data(username)
-        if not user_data:
-            logger.error(f"User data not found for {username}")
-            return None, None
-        logger.info(f"User data found for {username}")
+        profiles = get_profile_cache()
+        tasks = {
+            'artist_count': lambda: get_artist_count(username, artist),
+            'track_count': lambda: get_track_count(username, artist, title)
+        }
+        user_data = profiles.get(username)
+        if user_data is None:
+            tasks['user_data'] = lambda: profiles.refresh(username)
+        results = fetch_concurrently(tasks)
+
+        if 'user_data' in results:
+            user_data = results['user_data']
+            if user_data:
+                logger.info(f"User data found for {username}")
+            else:
+                logger.warning(f"User data not found for {username}")
+        user_data = user_data or {}
         logger.debug(f"User data: {user_data}")
 
-        library_data = get_library_data(username, artist, title)
-        if not library_data:
-            logger.error(f"Library data not found for {username}")
+        library_data = {
+            'artist_count': results['artist_count'],
+            'track_count': results['track_count']
+        }
+
+        if not user_data and library_data['artist_count'] is None and library_data['track_count'] is None:
+            logger.error(f"Last.fm stats could not be retrieved for {username}")
             return None, None
-        logger.info(f"Library data found for {username}")
         logger.debug(f"Library data: {library_data}")
 
-        self.last_fetched_track = track
+        # Only cache complete results so the next forced update retries missing fields
+        is_complete = user_data and None not in library_data.values()
+        self.last_fetched_track = track if is_complete else None
         self.cached_user_data = user_data
         self.cached_library_data = library_data
         return user_data, library_data
@@ -262,7 +352,7 @@ class DiscordRPC:
 
         asset = None
         if self.use_custom_profile_image:
-            asset = user_data["avatar_url"]
+            asset = user_data.get("avatar_url")
         elif self.use_default_icon:
             asset = DEFAULT_AVATAR_URL
         elif self.use_lastfm_icon:
@@ -270,16 +360,19 @@ class DiscordRPC:
         
         lines = {}
         if self.show_username:
-            lines['name'] = f"{user_data['display_name']} (@{username})"
+            display_name = user_data.get('display_name') or username
+            lines['name'] = f"{display_name} (@{username})"
         
-        # Unpack header status
-        scrobbles, artists, loved_tracks = user_data["header_status"]
-        if self.show_scrobbles:
-            lines["scrobbles"] = messenger('rpc_scrobbles', scrobbles)
-        if self.show_artists:
-            lines["artists"] = messenger('rpc_artists', artists)
-        if self.show_loved:
-            lines["loved_tracks"] = messenger('rpc_loved_tracks', loved_tracks)
+        # Unpack header status (missing if the profile page failed)
+        header_status = user_data.get("header_status")
+        if header_status:
+            scrobbles, artists, loved_tracks = header_status
+            if self.show_scrobbles:
+                lines["scrobbles"] = messenger('rpc_scrobbles', scrobbles)
+            if self.show_artists:
+                lines["artists"] = messenger('rpc_artists', artists)
+            if self.show_loved:
+                lines["loved_tracks"] = messenger('rpc_loved_tracks', loved_tracks)
 
         text = self._format_image_text(lines, RPC_LINE_LIMIT, RPC_XCHAR)
         return asset, text
@@ -295,14 +388,52 @@ class DiscordRPC:
         
         return artwork, text
 
+    @staticmethod
+    def _diff_payload(previous, current):
+        """Returns the fields of current that differ from previous (all of them if nothing was sent)."""
+        if previous is None:
+            return dict(current)
+        keys = previous.keys() | current.keys()
+        return {key: current.get(key) for key in keys if previous.get(key) != current.get(key)}
+
     def _send_rpc_update(self, update_assets):
-        """Sends the prepared payload to Discord."""
+        """Hands the prepared payload to the rate-limited send queue."""
         if self.RPC:
+            self.send_queue.submit(update_assets)
+
+    def _deliver(self, update_assets):
+        """
+        Sends a payload to Discord, skipping it if nothing visible changed.
+
+        Called by the send queue once the rate window allows it. Returns
+        whether the payload was actually sent.
+        """
+        with self._io_lock:
+            if not self.is_connected:
+                return False
+            changes = self._diff_payload(self.last_payload, update_assets)
+            if not changes:
+                self.updates_skipped += 1
+                get_metrics().inc("discord_updates_total", result="skipped")
+                logger.debug(f"RPC update skipped, payload unchanged (sent {self.updates_sent}, skipped {self.updates_skipped})")
+                return False
             try:
                 logger.debug(f"RPC update_assets: {update_assets}")
-                self.RPC.update(**update_assets)
+                logger.debug(f"RPC changed fields: {sorted(changes)}")
+                with get_metrics().timed("rpc_update"):
+                    self.RPC.update(**update_assets)
+                self.last_payload = dict(update_assets)
+                self.updates_sent += 1
+                recorder = get_recorder()
+                if recorder:
+                    recorder.record_activity(update_assets)
+                get_metrics().inc("discord_updates_total", result="sent")
+                return True
             except Exception as e:
+                self.last_payload = None
+                get_metrics().inc("discord_updates_total", result="failed")
                 logger.error(f'Error updating RPC: {e}')
                 # If update fails (e.g. BrokenPipe, Request Terminated), force disconnect
                 # so the app effectively tries to reconnect on next cycle.
                 self._disconnect()
+                return False
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+
+from constants.project import RPC_UPDATE_INTERVAL, METRICS_QUEUE_BUCKETS
+from utils.metrics import get_metrics
+
+logger = logging.getLogger('rpc')
+
+class ActivitySendQueue:
+    """
+    Keeps activity updates within Discord's client-side rate limit.
+
+    At most one payload goes out per ``min_interval`` seconds. Payloads
+    submitted while the window is closed wait in a single slot where the
+    newest replaces the older ones, and a timer flushes it the moment the
+    window opens. ``send`` is called with the payload and returns whether it
+    actually went out (a skipped no-op doesn't use up the window).
+
+    Queue latency is the time from the first unsent submit to the send, so
+    it measures how stale the visible presence was. It goes to the metrics
+    along with the replaced payloads and the current staleness.
+    ``timer(wait, callback)`` arms the flush timer and returns an object with
+    ``cancel()``; it defaults to a daemon threading.Timer.
+    """
+
+    def __init__(self, send, min_interval=RPC_UPDATE_INTERVAL, clock=time.monotonic, timer=None):
+        self._send = send
+        self.min_interval = min_interval
+        self.clock = clock
+        self._start_timer = timer or self._start_thread_timer
+        self._pending = None
+        self._pending_since = None
+        self._last_sent_at = None
+        self._timer = None
+        self._lock = threading.Lock()
+        # Held across taking a payload and sending it, so sends can't reorder
+        self._flush_lock = threading.Lock()
+        get_metrics().track_send_queue(self)
+
+    def _window_wait(self) -> float:
+        """Seconds until the next send is allowed. Caller holds the lock."""
+        if self._last_sent_at is None:
+            return 0.0
+        return max(0.0, self._last_sent_at + self.min_interval - self.clock())
+
+    @staticmethod
+    def _start_thread_timer(wait, callback):
+        timer = threading.Timer(wait, callback)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def _schedule(self, wait):
+        """Arms the flush timer unless one is already armed. Caller holds the lock."""
+        if self._timer is None:
+            self._timer = self._start_timer(wait, self.flush)
+
+    def submit(self, payload):
+        """Queues a payload, replacing any pending one, and sends it now if the window is open."""
+        with self._lock:
+            if self._pending is None:
+                self._pending_since = self.clock()
+            else:
+                get_metrics().inc("discord_updates_replaced_total")
+            self._pending = payload
+            wait = self._window_wait()
+            if wait > 0:
+                logger.debug(f"Activity update queued, rate window opens in {wait:.1f}s")
+                self._schedule(wait)
+                return
+        self.flush()
+
+    def flush(self):
+        """Sends the pending payload if the rate window allows it, otherwise re-arms the timer."""
+        with self._flush_lock:
+            with self._lock:
+                self._timer = None
+                if self._pending is None:
+                    return
+                wait = self._window_wait()
+                if wait > 0:
+                    self._schedule(wait)
+                    return
+                payload, since = self._pending, self._pending_since
+                self._pending = self._pending_since = None
+
+            try:
+                sent = self._send(payload)
+            except Exception as e:
+                # Runs on the timer thread, where nothing would catch it
+                logger.error(f"Activity update failed: {e}")
+                sent = False
+            if sent:
+                with self._lock:
+                    self._last_sent_at = self.clock()
+                    latency = self._last_sent_at - since
+                get_metrics().observe("discord_send_latency_seconds", latency, buckets=METRICS_QUEUE_BUCKETS)
+                logger.debug(f"Activity update sent after {latency:.2f}s in queue")
+
+    def clear(self):
+        """Drops the pending payload and forgets the rate window (e.g. when the connection closes)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = self._pending_since = None
+            self._last_sent_at = None
+
+    @property
+    def staleness(self) -> float:
+        """Seconds the oldest unsent change has been waiting (0 if nothing is pending)."""
+        with self._lock:
+            return self.clock() - self._pending_since if self._pending_since is not None else 0.0
@@ -0,0 +1,137 @@
+import logging
+import re
+import threading
+from typing import Optional, Tuple
+
+from utils.cache import PersistentCache
+from api.lastfm.metadata import normalize
+from constants.project import (
+    CACHE_DB_PATH, TRACK_CACHE_TTL, ARTWORK_CACHE_MAX_ENTRIES,
+    ARTWORK_MIN_PIXELS, LASTFM_PLACEHOLDER_IMAGE_ID
+)
+
+logger = logging.getLogger('metadata')
+
+# Last.fm image size names, smallest first: (name, edge in pixels, CDN path segment)
+IMAGE_SIZES = (
+    ("small", 34, "34s"),
+    ("medium", 64, "64s"),
+    ("large", 174, "174s"),
+    ("extralarge", 300, "300x300"),
+)
+# Size names from smallest to largest, 'mega' being the original upload
+SIZE_ORDER = [name for name, _, _ in IMAGE_SIZES] + ["mega"]
+
+# https://lastfm.freetls.fastly.net/i/u/<size>/<id>.<ext>; originals have no size segment
+_CDN_IMAGE = re.compile(r"^(?P<base>https?://[^/]+/i/u/)(?:[^/]+/)?(?P<file>[0-9a-f]{32}\.\w+)$")
+
+def needed_size(min_pixels: int = ARTWORK_MIN_PIXELS) -> tuple:
+    """Returns the smallest Last.fm size at least min_pixels wide (the largest if none is)."""
+    for size in IMAGE_SIZES:
+        if size[1] >= min_pixels:
+            return size
+    return IMAGE_SIZES[-1]
+
+def is_placeholder(url: Optional[str]) -> bool:
+    """Tells whether a URL is Last.fm's "no image" star."""
+    return bool(url) and LASTFM_PLACEHOLDER_IMAGE_ID in url
+
+def pick_image(images: dict, min_pixels: int = ARTWORK_MIN_PIXELS) -> Optional[str]:
+    """
+    Selects the smallest variant of a Last.fm image that Discord needs.
+
+    Every size of a Last.fm CDN image lives at the same path with another
+    size segment, so any variant can be turned into the needed one.
+
+    Args:
+        images (dict): Size name mapped to URL, as parsed by image_urls.
+        min_pixels (int): Edge length the image should have at least.
+
+    Returns:
+        str: The image URL, or None if there is no real image.
+    """
+    usable = {size: url for size, url in images.items() if url and not is_placeholder(url)}
+    if not usable:
+        return None
+
+    name, _, segment = needed_size(min_pixels)
+    if name in usable:
+        return usable[name]
+    for url in usable.values():
+        match = _CDN_IMAGE.match(url)
+        if match:
+            return f"{match['base']}{segment}/{match['file']}"
+
+    # Not on the CDN: the next larger size there is, else the largest smaller one
+    position = SIZE_ORDER.index(name)
+    for size in SIZE_ORDER[position:] + SIZE_ORDER[:position][::-1]:
+        if size in usable:
+            return usable[size]
+    return next(iter(usable.values()))
+
+class ArtworkResolver:
+    """
+    Picks the presence image of a track in one lookup.
+
+    The fallback chain is the album cover, then the track's own image, then
+    the artist image; when none exists the presence shows the day/night
+    theme cover (see DiscordRPC). Resolved album covers and artist images
+    are cached per album and per artist, so a track whose poll carries no
+    image still gets the cover another track resolved before.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self.cache = PersistentCache(path, 'artwork', TRACK_CACHE_TTL, ARTWORK_CACHE_MAX_ENTRIES)
+
+    def _cached(self, key) -> Optional[str]:
+        cached = self.cache.get(key)
+        return cached[0] if cached else None
+
+    def _remember(self, key, url, known):
+        if url != known:
+            self.cache.set(key, url)
+
+    def resolve(self, track, album_cover=None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Returns the image to show for a track.
+
+        Args:
+            track (RecentTrack): The playing track, with the images its poll carried.
+            album_cover (str): The album's cover from album.getInfo, if known.
+
+        Returns:
+            tuple: (url, source), source being "album", "track" or "artist";
+                (None, None) when the theme cover has to be used.
+        """
+        artist = normalize(track.artist)
+        if track.album:
+            album_key = ("album", artist, normalize(track.album))
+            cached = self._cached(album_key)
+            cover = album_cover if album_cover and not is_placeholder(album_cover) else cached
+            if cover:
+                self._remember(album_key, cover, cached)
+                return cover, "album"
+
+        image = pick_image(track.images)
+        if image:
+            return image, "track"
+
+        artist_key = ("artist", artist)
+        cached = self._cached(artist_key)
+        image = pick_image(track.artist_images) or cached
+        if image:
+            self._remember(artist_key, image, cached)
+            return image, "artist"
+        return None, None
+
+_artwork_resolver = None
+_artwork_resolver_lock = threading.Lock()
+
+def get_artwork_resolver() -> ArtworkResolver:
+    """Returns the shared artwork resolver, opening its cache on first use."""
+    global _artwork_resolver
+    if _artwork_resolver is None:
+        with _artwork_resolver_lock:
+            if _artwork_resolver is None:
+                _artwork_resolver = ArtworkResolver()
+    return _artwork_resolver
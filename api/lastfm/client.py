@@ -0,0 +1,94 @@
+import logging
+import threading
+from collections import Counter
+from urllib.parse import urlencode
+
+import requests
+
+import constants.project as project
+from utils.request_utils import get_response
+from utils.rate_limiter import RateLimiter
+
+logger = logging.getLogger('lastfm')
+
+_call_counts = Counter()
+_call_counts_lock = threading.Lock()
+
+# Every User in the process shares the API key's request budget
+rate_limiter = RateLimiter(project.LASTFM_API_RATE, project.LASTFM_API_BURST)
+
+class LastFMError(Exception):
+    """An error reported by the Last.fm web service."""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code}: {message}")
+        self.code = int(code) if str(code).isdigit() else code
+        self.message = message
+
+class MalformedResponseError(LastFMError):
+    """The web service answered with something that isn't valid JSON."""
+
+# Error code for "Invalid API key" in the Last.fm API
+INVALID_API_KEY = 10
+
+def _error_from_response(response) -> LastFMError:
+    try:
+        data = response.json()
+        return LastFMError(data.get("error", response.status_code), data.get("message", ""))
+    except ValueError:
+        return LastFMError(response.status_code, response.reason)
+
+def call_method(method: str, **params) -> dict:
+    """
+    Calls a Last.fm web service method through the shared HTTP session.
+
+    Args:
+        method (str): API method name, e.g. 'user.getRecentTracks'.
+        **params: Method parameters.
+
+    Returns:
+        dict: The decoded JSON response.
+
+    Raises:
+        LastFMError: If the web service reports an error.
+        requests.RequestException: If the service could not be reached.
+    """
+    query = {"method": method, "api_key": project.API_KEY, "format": "json"}
+    query.update({key: value for key, value in params.items() if value is not None})
+    url = f"{project.LASTFM_API_URL}?{urlencode(query)}"
+
+    with _call_counts_lock:
+        _call_counts[method] += 1
+
+    rate_limiter.acquire()
+    try:
+        response = get_response(url)
+    except requests.HTTPError as e:
+        # The API reports errors with 4xx statuses and a JSON body
+        if e.response is not None:
+            raise _error_from_response(e.response) from e
+        raise
+
+    try:
+        data = response.json()
+    except ValueError as e:
+        raise MalformedResponseError("malformed", str(e)) from e
+
+    if "error" in data:
+        raise LastFMError(data["error"], data.get("message", ""))
+    return data
+
+def get_call_counts() -> dict:
+    """Returns how many times each API method has been called."""
+    with _call_counts_lock:
+        return dict(_call_counts)
+
+def as_list(value) -> list:
+    """Normalizes a JSON node that is a single object when there is one item and a list otherwise."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def image_urls(images) -> dict:
+    """Maps Last.fm image size names ('small' ... 'mega') to non-empty URLs."""
+    return {image.get("size"): image.get("#text") for image in as_list(images) if image.get("#text")}
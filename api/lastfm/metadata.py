@@ -0,0 +1,88 @@
+import logging
+import threading
+from typing import Optional, Tuple
+
+from utils.cache import PersistentCache
+from constants.project import (
+    CACHE_DB_PATH, TRACK_CACHE_TTL,
+    TRACK_CACHE_MAX_ENTRIES, ALBUM_CACHE_MAX_ENTRIES
+)
+
+logger = logging.getLogger('metadata')
+
+def normalize(name) -> str:
+    """Case- and whitespace-insensitive form of an artist, album or track name."""
+    return " ".join((name or "").split()).casefold()
+
+class TrackMetadataCache:
+    """
+    Persistent track and album metadata shared by every user.
+
+    Tracks map (artist, title) to ``{album, artwork, duration}``, artwork
+    being the album cover (see ArtworkResolver for the full chain). Albums map
+    (artist, album) to ``{artwork, durations, tracks}``, where ``durations``
+    holds the length in ms of every track on the album's tracklist, so other
+    tracks of an album seen once resolve without a request, and ``tracks``
+    lists their titles in tracklist order.
+    """
+
+    def __init__(self, path=CACHE_DB_PATH):
+        self.tracks = PersistentCache(path, 'track', TRACK_CACHE_TTL, TRACK_CACHE_MAX_ENTRIES)
+        self.albums = PersistentCache(path, 'album', TRACK_CACHE_TTL, ALBUM_CACHE_MAX_ENTRIES)
+
+    def get_track(self, artist, title) -> Optional[Tuple[dict, bool]]:
+        """Returns (entry, is_stale) for a track, or None on a miss."""
+        return self.tracks.get((normalize(artist), normalize(title)))
+
+    def set_track(self, artist, title, album, artwork, duration):
+        self.tracks.set((normalize(artist), normalize(title)), {
+            "album": album, "artwork": artwork, "duration": duration
+        })
+
+    def get_album(self, artist, album) -> Optional[Tuple[dict, bool]]:
+        """Returns (entry, is_stale) for an album, or None on a miss."""
+        return self.albums.get((normalize(artist), normalize(album)))
+
+    def set_album(self, artist, album, artwork, durations: dict) -> dict:
+        """Stores an album's cover and its tracklist durations (title -> ms, in order); returns the entry."""
+        entry = {
+            "artwork": artwork,
+            "durations": {normalize(title): duration for title, duration in durations.items()},
+            "tracks": list(durations)
+        }
+        self.albums.set((normalize(artist), normalize(album)), entry)
+        return entry
+
+    def album_duration(self, entry: dict, title) -> Optional[int]:
+        """Looks up a track's length in a cached album entry."""
+        return entry["durations"].get(normalize(title))
+
+    def next_on_album(self, artist, album, title) -> Optional[str]:
+        """Returns the title that follows a track on a cached album, or None."""
+        cached = self.get_album(artist, album) if album else None
+        # Entries cached before tracklists were kept have no "tracks"
+        tracks = cached[0].get("tracks", []) if cached else []
+        titles = [normalize(track) for track in tracks]
+        try:
+            position = titles.index(normalize(title))
+        except ValueError:
+            return None
+        return tracks[position + 1] if position + 1 < len(tracks) else None
+
+    def stats(self) -> dict:
+        return {
+            "track_hits": self.tracks.hits, "track_misses": self.tracks.misses,
+            "album_hits": self.albums.hits, "album_misses": self.albums.misses,
+        }
+
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+def get_metadata_cache() -> TrackMetadataCache:
+    """Returns the shared track metadata cache, opening it on first use."""
+    global _metadata_cache
+    if _metadata_cache is None:
+        with _metadata_cache_lock:
+            if _metadata_cache is None:
+                _metadata_cache = TrackMetadataCache()
+    return _metadata_cache
@@ -0,0 +1,61 @@
+import logging
+import threading
+
+from api.lastfm.user.library import get_library_cache, library_cache_key
+from api.lastfm.user.profile import get_profile_cache
+
+logger = logging.getLogger('counters')
+
+class ScrobbleCounters:
+    """
+    Keeps scrobble totals current locally between page scrapes.
+
+    Scrobbles are taken from the recent tracks every now-playing poll
+    already returns: an entry whose scrobble time is newer than the newest
+    one seen before is a scrobble Last.fm just recorded. For each, the
+    profile header counters (in the profile cache) and the artist/track
+    counts (in the library cache) are bumped in place. Neither bump resets
+    its cache's freshness, so the caches' own TTL refreshes reconcile the
+    local values with the server on a slow schedule.
+    """
+
+    def __init__(self):
+        self._last_scrobbled_at = {}
+        self._lock = threading.Lock()
+
+    def observe_recent_tracks(self, username, tracks) -> int:
+        """
+        Counts the scrobbles that appeared since the previous poll.
+
+        The first poll of a user only sets the starting point: what was
+        scrobbled before is already in the scraped counts.
+
+        Args:
+            username (str): The polled user.
+            tracks (list): The poll's RecentTrack entries, newest first.
+
+        Returns:
+            int: The number of scrobbles counted.
+        """
+        scrobbled = [track for track in tracks if track.scrobbled_at]
+        with self._lock:
+            last = self._last_scrobbled_at.get(username)
+            latest = max((track.scrobbled_at for track in scrobbled), default=0)
+            self._last_scrobbled_at[username] = max(latest, last or 0)
+        if last is None:
+            return 0
+
+        new = sorted((track for track in scrobbled if track.scrobbled_at > last), key=lambda track: track.scrobbled_at)
+        for track in new:
+            self.record_scrobble(username, track.artist, track.title)
+        return len(new)
+
+    def record_scrobble(self, username, artist, title):
+        """Counts one scrobble of a track towards the profile and library counters."""
+        cache = get_library_cache()
+        artist_count = cache.increment(library_cache_key(username, artist))
+        cache.increment(library_cache_key(username, artist, title))
+
+        # An artist count of 1 means this was the artist's first scrobble
+        get_profile_cache().bump_counters(username, scrobbles=1, artists=1 if artist_count == 1 else 0)
+        logger.debug(f"Counted scrobble locally: {artist} - {title}")
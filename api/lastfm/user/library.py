@@ -1,29 +1,107 @@
-from utils.request_utils import get_response, get_dom
+import logging
+import threading
+
+from utils.cache import PersistentCache
+from utils.metrics import get_metrics
+from utils.request_utils import get_parsed, fetch_concurrently, run_in_background
 from utils.string_utils import get_removal
 from utils.url_utils import url_encoder
-from constants.project import LASTFM_LIBRARY_URL
+from constants.project import (
+    LASTFM_LIBRARY_URL, CACHE_DB_PATH,
+    LIBRARY_CACHE_TTL, LIBRARY_CACHE_MAX_ENTRIES
+)
 
-def get_library_data(username, artist_name, track_name) -> dict:
+logger = logging.getLogger('library')
+
+_library_cache = None
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+def get_library_cache() -> PersistentCache:
+    """Returns the persistent scrobble count cache, opening it on first use."""
+    global _library_cache
+    if _library_cache is None:
+        with _cache_lock:
+            if _library_cache is None:
+                _library_cache = PersistentCache(CACHE_DB_PATH, 'library', LIBRARY_CACHE_TTL, LIBRARY_CACHE_MAX_ENTRIES)
+    return _library_cache
+
+def library_cache_key(username, artist_name, track_name=None) -> tuple:
+    """Builds the (username, artist, track) cache key; artist totals use an empty track."""
+    return (username.casefold(), artist_name.casefold(), (track_name or "").casefold())
 
+def _library_music_url(username, *parts) -> str:
     USER_LIBRARY_URL = LASTFM_LIBRARY_URL.format(username=username)
     # + ?date_preset=ALL (login req)
-    USER_LIBRARY_ARTIST_URL = "/".join([USER_LIBRARY_URL, "music", "+noredirect", url_encoder(artist_name)])
-    USER_LIBRARY_TRACK_URL = "/".join([USER_LIBRARY_URL, "music", "+noredirect", url_encoder(artist_name), "_", url_encoder(track_name)])
-
-    def parse_count(dom):
-        data = dom.find_all("p", {"class":"metadata-display"})
-        if data:
-            # if there is no artist info, return 0
-            data = data[0].text if len(data) != 0 else '0' 
-            data = get_removal(data,',', int)
-        else:
-            data = 0
-
-        return data
-
-    data = {
-         'artist_count': parse_count(get_dom(get_response(USER_LIBRARY_ARTIST_URL))),
-         'track_count': parse_count(get_dom(get_response(USER_LIBRARY_TRACK_URL)))
-         }
-
-    return data
\ No newline at end of file
+    return "/".join([USER_LIBRARY_URL, "music", "+noredirect", *parts])
+
+def parse_count(dom):
+    data = dom.find_all("p", {"class":"metadata-display"})
+    if data:
+        # if there is no artist info, return 0
+        data = data[0].text if len(data) != 0 else '0'
+        data = get_removal(data,',', int)
+    else:
+        data = 0
+
+    return data
+
+def _fetch_and_store(key, url) -> int:
+    # Deferred so bs4 loads on the first scrape, not at startup
+    from utils.html_utils import LIBRARY_COUNT_FILTER
+    # Artist totals are keyed with an empty track
+    with get_metrics().timed("library_track" if key[2] else "library_artist"):
+        count = get_parsed(url, parse_count, LIBRARY_COUNT_FILTER)
+    get_library_cache().set(key, count)
+    return count
+
+def _background_refresh(key, url):
+    """Refreshes a stale entry once, no matter how many lookups hit it meanwhile."""
+    with _cache_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _refresh():
+        try:
+            _fetch_and_store(key, url)
+            logger.debug(f"Refreshed stale library count for {key}")
+        finally:
+            with _cache_lock:
+                _refreshing.discard(key)
+
+    run_in_background(_refresh)
+
+def _get_cached_count(key, url) -> int:
+    """Serves a count from the cache, scraping only on a miss. Stale hits refresh in the background."""
+    cached = get_library_cache().get(key)
+    if cached is None:
+        return _fetch_and_store(key, url)
+
+    count, is_stale = cached
+    if is_stale:
+        _background_refresh(key, url)
+    return count
+
+def get_artist_count(username, artist_name) -> int:
+    """Returns the user's scrobble count for an artist."""
+    USER_LIBRARY_ARTIST_URL = _library_music_url(username, url_encoder(artist_name))
+    return _get_cached_count(library_cache_key(username, artist_name), USER_LIBRARY_ARTIST_URL)
+
+def get_track_count(username, artist_name, track_name) -> int:
+    """Returns the user's scrobble count for a single track."""
+    USER_LIBRARY_TRACK_URL = _library_music_url(username, url_encoder(artist_name), "_", url_encoder(track_name))
+    return _get_cached_count(library_cache_key(username, artist_name, track_name), USER_LIBRARY_TRACK_URL)
+
+def get_library_data(username, artist_name, track_name) -> dict:
+    """
+    Fetches the artist and track library pages concurrently.
+
+    A count whose page could not be fetched is left as None.
+    """
+    data = fetch_concurrently({
+        'artist_count': lambda: get_artist_count(username, artist_name),
+        'track_count': lambda: get_track_count(username, artist_name, track_name)
+    })
+
+    return data
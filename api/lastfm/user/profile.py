@@ -1,8 +1,17 @@
+import copy
 import logging
 import os
+import threading
+import time
 
-from constants.project import DEFAULT_AVATAR_ID, LASTFM_USER_URL
-from utils.request_utils import get_response, get_dom
+from constants.project import (
+    DEFAULT_AVATAR_ID, LASTFM_USER_URL, CACHE_DB_PATH,
+    PROFILE_IDENTITY_TTL, COUNTER_RECONCILE_INTERVAL
+)
+from api.lastfm.client import call_method
+from utils.cache import PersistentCache
+from utils.metrics import get_metrics
+from utils.request_utils import get_parsed, run_in_background
 from utils.string_utils import get_removal
 
 logger = logging.getLogger('profile')
@@ -68,6 +77,22 @@ def parse_user_header_status(page_content):
         logger.error(f"Error parsing user header status: {e}")
     return header_status
 
+def parse_user_data(page_content) -> dict:
+    """
+    Parses the profile header fields from the page content.
+
+    Args:
+        page_content (BeautifulSoup): The parsed HTML content.
+
+    Returns:
+        dict: The user's display name, avatar URL, and header status.
+    """
+    return {
+        "display_name": parse_user_display_name(page_content),
+        "avatar_url": parse_user_avatar_url(page_content),
+        "header_status": parse_user_header_status(page_content)
+    }
+
 def get_user_data(username) -> dict:
     """
     Retrieves the user data from their Last.fm profile page.
@@ -80,16 +105,173 @@ def get_user_data(username) -> dict:
     """
     USER_PROFILE_URL = LASTFM_USER_URL.format(username=username)
 
-    response = get_response(USER_PROFILE_URL)
-    if response.status_code in range(200, 299):
-        dom = get_dom(response)
-        data = {
-            "display_name": parse_user_display_name(dom),
-            "avatar_url": parse_user_avatar_url(dom),
-            "header_status": parse_user_header_status(dom)
-        }
-        logger.debug(f"User data retrieved successfully for {username}")
+    # Non-2xx responses raise in get_response; a 304 reuses the previous parse
+    # Deferred so bs4 loads on the first scrape, not at startup
+    from utils.html_utils import PROFILE_HEADER_FILTER
+    with get_metrics().timed("get_user_data"):
+        data = get_parsed(USER_PROFILE_URL, parse_user_data, PROFILE_HEADER_FILTER)
+    logger.debug(f"User data retrieved successfully for {username}")
+    return data
+
+def get_user_counters(username) -> list:
+    """
+    Retrieves the profile header counters from the web service, without the page.
+
+    Args:
+        username (str): The Last.fm username.
+
+    Returns:
+        list: Scrobbles, artists and loved tracks, in header order.
+
+    Raises:
+        LastFMError: If the web service reports an error.
+        requests.RequestException: If the service could not be reached.
+    """
+    with get_metrics().timed("get_user_counters"):
+        info = call_method("user.getInfo", user=username)["user"]
+        loved = call_method("user.getLovedTracks", user=username, limit=1)["lovedtracks"]
+    return [int(info.get("playcount", 0)), int(info.get("artist_count", 0)), int(loved["@attr"]["total"])]
+
+class ProfileCache:
+    """
+    Caches profile headers with separate lifetimes for identity and counter fields.
+
+    The display name and avatar rarely change and are scraped from the
+    profile page every ``identity_ttl``. The scrobble/artist/loved counters
+    are kept current locally (see ``ScrobbleCounters``) and reconciled after
+    ``counters_ttl`` from user.getInfo and user.getLovedTracks, two small
+    JSON calls instead of the page. Lookups never wait on the network: stale
+    data is served and refreshed once in the background. Entries are
+    persisted so a restart starts warm.
+    """
+
+    def __init__(self, identity_ttl=PROFILE_IDENTITY_TTL, counters_ttl=COUNTER_RECONCILE_INTERVAL):
+        self.identity_ttl = identity_ttl
+        self.counters_ttl = counters_ttl
+        # Freshness is tracked per field group here, the store only persists entries
+        self.store = PersistentCache(CACHE_DB_PATH, 'profile', float('inf'), 64)
+        self._profiles = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def _load(self, username):
+        """Returns the in-memory entry for a user, loading it from disk once. Caller holds the lock."""
+        if username not in self._profiles:
+            cached = self.store.get((username.casefold(),))
+            self._profiles[username] = cached[0] if cached else None
+        return self._profiles[username]
+
+    def _persist(self, username, entry):
+        self.store.set((username.casefold(),), entry)
+
+    def _identity_stale(self, entry) -> bool:
+        return entry is None or (time.time() - entry["identity_at"]) >= self.identity_ttl
+
+    def is_stale(self, username) -> bool:
+        """Returns True if either field group of the user's profile has expired."""
+        with self._lock:
+            entry = self._load(username)
+        if self._identity_stale(entry):
+            return True
+        return (time.time() - entry["counters_at"]) >= self.counters_ttl
+
+    def get(self, username):
+        """
+        Returns a copy of the cached profile data without blocking.
+
+        Schedules a background refresh if anything is stale.
+
+        Returns:
+            dict: display_name, avatar_url and header_status, or None if never fetched.
+        """
+        with self._lock:
+            entry = self._load(username)
+            data = copy.deepcopy(entry["data"]) if entry else None
+
+        if entry is not None and self.is_stale(username):
+            self.refresh_in_background(username)
         return data
-    else:
-        logger.error(f"Failed to retrieve user data for {username}, status code: {response.status_code}")
-        return {}
\ No newline at end of file
+
+    def refresh(self, username):
+        """
+        Refreshes what has expired now and stores the result.
+
+        The page is only fetched when the identity fields expired (or the
+        user was never fetched); fresh identity only needs the counters.
+        """
+        with self._lock:
+            entry = self._load(username)
+        if not self._identity_stale(entry):
+            return self.refresh_counters(username)
+
+        data = get_user_data(username)
+        if not data:
+            return None
+
+        now = time.time()
+        with self._lock:
+            self._log_drift(username, self._load(username), data["header_status"])
+            entry = {"data": data, "identity_at": now, "counters_at": now, "local_scrobbles": 0}
+            self._profiles[username] = entry
+            self._persist(username, entry)
+        return copy.deepcopy(data)
+
+    def refresh_counters(self, username):
+        """Reconciles the cached header counters with the web service."""
+        header_status = get_user_counters(username)
+        with self._lock:
+            entry = self._load(username)
+            if entry is None:
+                return None
+            self._log_drift(username, entry, header_status)
+            entry["data"]["header_status"] = header_status
+            entry["counters_at"] = time.time()
+            entry["local_scrobbles"] = 0
+            self._persist(username, entry)
+            return copy.deepcopy(entry["data"])
+
+    @staticmethod
+    def _log_drift(username, previous, header_status):
+        if previous and previous.get("local_scrobbles"):
+            drift = header_status[0] - previous["data"]["header_status"][0]
+            logger.debug(f"Reconciled counters for {username}, server drift: {drift:+d}")
+
+    def refresh_in_background(self, username):
+        """Refreshes the profile once on the fetch pool, however often it is requested meanwhile."""
+        with self._lock:
+            if username in self._refreshing:
+                return
+            self._refreshing.add(username)
+
+        def _refresh():
+            try:
+                self.refresh(username)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(username)
+
+        run_in_background(_refresh)
+
+    def bump_counters(self, username, scrobbles=1, artists=0):
+        """Applies a locally observed scrobble to the cached header counters."""
+        with self._lock:
+            entry = self._load(username)
+            if entry is None:
+                return
+            header_status = entry["data"]["header_status"]
+            header_status[0] += scrobbles
+            header_status[1] += artists
+            entry["local_scrobbles"] += scrobbles
+            self._persist(username, entry)
+
+_profile_cache = None
+_profile_cache_lock = threading.Lock()
+
+def get_profile_cache() -> ProfileCache:
+    """Returns the shared profile cache, creating it on first use."""
+    global _profile_cache
+    if _profile_cache is None:
+        with _profile_cache_lock:
+            if _profile_cache is None:
+                _profile_cache = ProfileCache()
+    return _profile_cache
@@ -1,65 +1,224 @@
 import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+import requests
 
-import pylast
 import constants.project as project
+from api.lastfm.client import (
+    call_method, as_list, image_urls,
+    LastFMError, MalformedResponseError, INVALID_API_KEY
+)
+from api.lastfm.metadata import get_metadata_cache
+from api.lastfm.artwork import get_artwork_resolver, pick_image
+from utils.request_utils import run_in_background
 
 logger = logging.getLogger('lastfm')
 
+@dataclass(frozen=True)
+class RecentTrack:
+    """One entry of a user.getRecentTracks (extended) response."""
+    artist: str
+    title: str
+    album: Optional[str] = None
+    images: dict = field(default_factory=dict, compare=False)
+    artist_images: dict = field(default_factory=dict, compare=False)
+    now_playing: bool = False
+    scrobbled_at: Optional[int] = None
+
+    def __str__(self):
+        return f"{self.artist} - {self.title}"
+
+    @classmethod
+    def from_json(cls, node) -> 'RecentTrack':
+        artist = node.get("artist") or {}
+        album = (node.get("album") or {}).get("#text") or None
+        date = node.get("date") or {}
+        return cls(
+            artist=artist.get("name") or artist.get("#text", ""),
+            title=node.get("name", ""),
+            album=album,
+            images=image_urls(node.get("image")),
+            artist_images=image_urls(artist.get("image")),
+            now_playing=(node.get("@attr") or {}).get("nowplaying") == "true",
+            scrobbled_at=int(date["uts"]) if date.get("uts") else None
+        )
+
 class User:
     def __init__(self, username, cooldown=None):
-        from constants.project import API_KEY, API_SECRET, DEFAULT_COOLDOWN
+        from constants.project import DEFAULT_COOLDOWN
         self.username = username
         self.cooldown = cooldown if cooldown is not None else DEFAULT_COOLDOWN
-        
-        # Initialize network with current keys
-        self.network = pylast.LastFMNetwork(API_KEY, API_SECRET)
-        self.lastfm_user = self.network.get_user(username)
-        
+
         self.last_track = None
         self.last_track_info = None
+        self.recent_tracks = []
+        self.request_count = 0
 
-    def _get_current_track(self):
-        try:
-            return self.lastfm_user.get_now_playing()
-        except pylast.WSError as e:
-            if "Invalid API key" in str(e):
+    def _call(self, method, **params):
+        self.request_count += 1
+        return call_method(method, **params)
+
+    def _handle_error(self, error):
+        """Logs a web service failure the way the rest of the app reports them."""
+        if isinstance(error, MalformedResponseError):
+            logger.error(project.TRANSLATIONS['pylast_malformed_response_error'])
+        elif isinstance(error, LastFMError):
+            if error.code == INVALID_API_KEY:
                 logger.critical("CRITICAL: Invalid API Key. Please update config.yaml with a valid key from Last.fm.")
-                import os
                 os._exit(1)
-            logger.error(f"{project.TRANSLATIONS['pylast_ws_error'].format(self.cooldown)} | Details: {e}")
-        except pylast.NetworkError:
+            logger.error(f"{project.TRANSLATIONS['pylast_ws_error'].format(self.cooldown)} | Details: {error}")
+        else:
             logger.error(project.TRANSLATIONS['pylast_network_error'])
-        except pylast.MalformedResponseError:
-            logger.error(project.TRANSLATIONS['pylast_malformed_response_error'])
+
+    def _get_recent_tracks(self, limit=2):
+        """
+        Fetches the latest tracks in one user.getRecentTracks (extended) call.
+
+        The first entry is the now-playing track if something is playing; it
+        already carries the album, artwork URLs and artist images.
+        """
+        try:
+            data = self._call("user.getRecentTracks", user=self.username, limit=limit, extended=1)
+            nodes = as_list((data.get("recenttracks") or {}).get("track"))
+            return [RecentTrack.from_json(node) for node in nodes]
+        except (LastFMError, requests.RequestException) as e:
+            self._handle_error(e)
         return None
 
-    def _get_track_info(self, current_track):
-        title, artist, album, artwork, time_remaining = None, None, None, None, 0
+    def get_history(self, limit):
+        """Returns up to limit recent tracks, newest first (empty if unreachable)."""
+        return self._get_recent_tracks(limit) or []
+
+    def _get_current_track(self):
+        tracks = self._get_recent_tracks()
+        if tracks is None:
+            return None
+        self.recent_tracks = tracks
+        if tracks and tracks[0].now_playing:
+            return tracks[0]
+        return None
+
+    def _fetch_album(self, artist, album):
+        """Fetches an album's cover and tracklist durations into the metadata cache."""
         try:
-            title = current_track.get_title()
-            artist = current_track.get_artist()
-            album = current_track.get_album()
-            if album:
-                artwork = album.get_cover_image()
-            time_remaining = current_track.get_duration()
-        except pylast.WSError as e:
-            logger.error(f'pylast.WSError: {e}')
-        except pylast.NetworkError:
-            logger.error(project.TRANSLATIONS['pylast_network_error'])
+            data = self._call("album.getInfo", artist=artist, album=album).get("album") or {}
+        except LastFMError as e:
+            logger.debug(f'No album info for {artist} - {album}: {e}')
+            data = {}
+        except requests.RequestException as e:
+            logger.error(f'Album lookup failed: {e}')
+            return None
+
+        durations = {}
+        for node in as_list((data.get("tracks") or {}).get("track")):
+            try:
+                # Album tracklists give durations in seconds
+                durations[node.get("name", "")] = int(node.get("duration") or 0) * 1000
+            except ValueError:
+                continue
+        artwork = pick_image(image_urls(data.get("image")))
+        return get_metadata_cache().set_album(artist, album, artwork, durations)
+
+    def get_duration(self, artist, title):
+        """
+        Fetches the track length in ms with track.getInfo.
+
+        Returns 0 if the service doesn't know it, None if it couldn't be reached.
+        """
+        try:
+            data = self._call("track.getInfo", artist=artist, track=title)
+            return int((data.get("track") or {}).get("duration") or 0)
+        except LastFMError as e:
+            logger.debug(f'No duration for {artist} - {title}: {e}')
+            return 0
+        except requests.RequestException as e:
+            logger.error(f'Duration lookup failed: {e}')
+            return None
+        except ValueError:
+            return 0
+
+    def _fetch_metadata(self, current_track, use_cached_album=True):
+        """
+        Resolves album, album cover and duration from the network and caches them.
+
+        An album seen before supplies the cover and the duration of every
+        track on it, so only tracks off its tracklist need track.getInfo.
+        """
+        cache = get_metadata_cache()
+        artist, title, album = current_track.artist, current_track.title, current_track.album
+        artwork, duration = None, None
+        album_unreachable = False
+
+        if album:
+            cached = cache.get_album(artist, album) if use_cached_album else None
+            album_entry = cached[0] if cached else self._fetch_album(artist, album)
+            if album_entry:
+                artwork = album_entry["artwork"]
+                duration = cache.album_duration(album_entry, title)
+            else:
+                album_unreachable = True
+
+        if not duration:
+            duration = self.get_duration(artist, title)
+            if duration is None:
+                # Unreachable, don't remember a guess
+                return {"album": album, "artwork": artwork, "duration": 0}
+
+        if album_unreachable:
+            # A network error, not a missing cover: don't cache the track without
+            # it for TRACK_CACHE_TTL, the next play tries the album again
+            return {"album": album, "artwork": artwork, "duration": duration}
+
+        cache.set_track(artist, title, album, artwork, duration)
+        return {"album": album, "artwork": artwork, "duration": duration}
+
+    def _resolve_metadata(self, current_track):
+        """Serves track metadata from the cache, fetching only on a miss. Stale hits refresh in the background."""
+        cached = get_metadata_cache().get_track(current_track.artist, current_track.title)
+        if cached is None:
+            return self._fetch_metadata(current_track)
+
+        entry, is_stale = cached
+        if is_stale:
+            run_in_background(lambda: self._fetch_metadata(current_track, use_cached_album=False))
+        # The poll response is fresher than the cache for what it carries
+        return {
+            "album": current_track.album or entry["album"],
+            "artwork": entry["artwork"],
+            "duration": entry["duration"]
+        }
+
+    def prefetch_metadata(self, artist, title, album=None):
+        """Resolves a track that is not playing yet, so its metadata is cached when it does."""
+        return self._resolve_metadata(RecentTrack(artist=artist, title=title, album=album))
+
+    def _get_track_info(self, current_track):
+        requests_before = self.request_count
+        title, artist = current_track.title, current_track.artist
+        metadata = self._resolve_metadata(current_track)
+        # Matches the previous str(pylast.Album) rendering used in the presence state
+        album = f"{artist} - {metadata['album']}" if metadata["album"] else None
+        artwork, source = get_artwork_resolver().resolve(current_track, metadata["artwork"])
+        time_remaining = metadata["duration"]
+
         if artwork:
-            logger.debug(f"Fetched artwork URL: {artwork}")
+            logger.debug(f"Fetched artwork URL ({source} image): {artwork}")
         else:
             logger.debug("No artwork found for track.")
+        logger.debug(f"Resolved {current_track} with {self.request_count - requests_before + 1} API request(s), "
+                     f"metadata cache: {get_metadata_cache().stats()}")
         return title, artist, album, artwork, time_remaining
 
     def now_playing(self):
         current_track = self._get_current_track()
-        
+
         if current_track:
             # If track is same as last time, return cached info
             if self.last_track and str(current_track) == str(self.last_track):
                 return current_track, self.last_track_info
-                
+
             # New track, fetch info
             info = self._get_track_info(current_track)
             self.last_track = current_track
@@ -0,0 +1,129 @@
+"""
+Local stand-in for the Discord client's IPC socket used by the offline benchmarks.
+
+Listens on a Unix socket named ``discord-ipc-0`` in a private directory and
+points ``XDG_RUNTIME_DIR`` at it, which is where pypresence looks for the
+client. It answers the handshake with READY and every SET_ACTIVITY with an
+echo of the activity, the way the real client does, and records when each
+activity arrived. ``latency`` delays every answer.
+
+Unix only: on Windows pypresence talks to a named pipe instead.
+"""
+import json
+import os
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import time
+
+OP_HANDSHAKE = 0
+OP_FRAME = 1
+OP_CLOSE = 2
+
+READY = {
+    "cmd": "DISPATCH",
+    "evt": "READY",
+    "data": {
+        "v": 1,
+        "config": {"cdn_host": "cdn.discordapp.com", "api_endpoint": "//discord.com/api", "environment": "production"},
+        "user": {"id": "1", "username": "benchuser", "discriminator": "0", "avatar": None},
+    },
+}
+
+class FakeDiscordServer:
+    """Runs the fake IPC endpoint on a background thread; usable as a context manager."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        # (monotonic time, activity dict or None when cleared) per SET_ACTIVITY
+        self.activities = []
+        self.connections = 0
+        self._directory = tempfile.mkdtemp(prefix="discord-ipc-")
+        self.path = os.path.join(self._directory, "discord-ipc-0")
+        self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._previous_runtime_dir = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def _read_exact(conn, size):
+        data = b""
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _send(self, conn, op, payload):
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(payload).encode("utf-8")
+        conn.sendall(struct.pack("<II", op, len(body)) + body)
+
+    def _serve(self, conn):
+        with conn:
+            while True:
+                header = self._read_exact(conn, 8)
+                if header is None:
+                    return
+                op, length = struct.unpack("<II", header)
+                body = self._read_exact(conn, length)
+                if body is None:
+                    return
+                message = json.loads(body)
+                if op == OP_HANDSHAKE:
+                    self._send(conn, OP_FRAME, READY)
+                elif op == OP_CLOSE:
+                    return
+                elif message.get("cmd") == "SET_ACTIVITY":
+                    activity = message.get("args", {}).get("activity")
+                    with self._lock:
+                        self.activities.append((time.monotonic(), activity))
+                    self._send(conn, OP_FRAME, {"cmd": "SET_ACTIVITY", "evt": None,
+                                                "data": activity, "nonce": message.get("nonce")})
+                else:
+                    self._send(conn, OP_FRAME, {"cmd": message.get("cmd"), "evt": None,
+                                                "data": None, "nonce": message.get("nonce")})
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def first_activity_after(self, since: float, details: str):
+        """Returns the arrival time of the first activity showing ``details`` at or after ``since``."""
+        with self._lock:
+            for arrived, activity in self.activities:
+                if arrived >= since and activity and activity.get("details") == details:
+                    return arrived
+        return None
+
+    def __enter__(self):
+        self._listener.bind(self.path)
+        self._listener.listen()
+        self._previous_runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        os.environ["XDG_RUNTIME_DIR"] = self._directory
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._closed = True
+        try:
+            # Wakes the blocked accept() on Linux
+            self._listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._listener.close()
+        if self._previous_runtime_dir is None:
+            os.environ.pop("XDG_RUNTIME_DIR", None)
+        else:
+            os.environ["XDG_RUNTIME_DIR"] = self._previous_runtime_dir
+        shutil.rmtree(self._directory, ignore_errors=True)
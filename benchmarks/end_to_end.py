@@ -0,0 +1,136 @@
+"""
+End-to-end presence cycle: track change to Discord activity, offline.
+
+Runs the headless PresenceEngine in a child process against the local
+Last.fm stand-in (web service and profile/library pages) and a fake Discord
+IPC socket, then plays a scripted listening session: ``--tracks`` new
+tracks from albums of three, a pause, and the first two tracks again. Each
+step lasts ``--track-length`` seconds of wall time, so the real poll
+scheduler, caches and Discord rate window are exercised.
+
+Reports, per track change, the time until the fake Discord client received
+an activity showing the new title; the stand-in requests per track change
+(web service calls and scraped pages); and the app process's CPU time
+scaled to one hour.
+
+Unix only (the fake Discord client is a Unix socket).
+
+Usage:
+    python -m benchmarks.end_to_end [--tracks 6] [--track-length 20] [--latency 0.05]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ALBUM_SIZE = 3
+
+def _child(api_url: str, base_url: str):
+    logging.basicConfig(level=logging.WARNING)
+    root = os.getcwd()
+    import constants.project as project
+    project.USERNAME, project.API_KEY, project.API_SECRET, project.APP_LANG = "benchuser", "benchmark", "", "en-US"
+    project.LASTFM_API_URL = api_url
+    project.TRANSLATIONS  # loaded from the repo before leaving it
+
+    import api.lastfm.user.library as library
+    import api.lastfm.user.profile as profile
+    library.LASTFM_LIBRARY_URL = f"{base_url}/user/{{username}}/library"
+    profile.LASTFM_USER_URL = f"{base_url}/user/{{username}}"
+
+    from core.engine import PresenceEngine
+    from utils.session_recorder import get_recorder
+    # Opened before leaving the repo so a relative LASTFM_RPC_RECORD path works
+    recorder = get_recorder()
+    with tempfile.TemporaryDirectory() as directory:
+        # CACHE_DB_PATH is relative, so every run starts with empty caches
+        os.chdir(directory)
+        engine = PresenceEngine()
+        cpu_before = time.process_time()
+        engine.rpc_thread.start()
+        sys.stdin.readline()
+        cpu = time.process_time() - cpu_before
+        print(json.dumps({
+            "cpu": cpu,
+            "updates_sent": engine.rpc.updates_sent,
+            "updates_skipped": engine.rpc.updates_skipped,
+        }), flush=True)
+        os.chdir(root)
+    if recorder:
+        recorder.close()
+    # The engine thread never returns on its own
+    os._exit(0)
+
+def _session(tracks: int, length: float) -> list:
+    """(artist, title, album, duration ms) per step; None is a pause."""
+    plays = [(f"Artist {i // ALBUM_SIZE}", f"Track {i}", f"Album {i // ALBUM_SIZE}", int(length * 1000))
+             for i in range(tracks)]
+    return plays + [None] + plays[:2]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=6, help="distinct tracks in the session")
+    parser.add_argument("--track-length", type=float, default=20.0, help="seconds each track (and the pause) lasts")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated Last.fm round trip in seconds")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return _child(args.api_url, args.base_url)
+
+    from benchmarks.standin import StandInServer
+    from benchmarks.discord_ipc import FakeDiscordServer
+
+    session = _session(args.tracks, args.track_length)
+    changes = []
+    with StandInServer(latency=args.latency) as server, FakeDiscordServer() as discord:
+        for step in session:
+            if step:
+                server.add_track(*step)
+        app = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.end_to_end", "--child",
+             "--api-url", server.api_url, "--base-url", server.base_url],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        start = time.monotonic()
+        for step in session:
+            if step is None:
+                server.set_now_playing()
+                print(f"  pause for {args.track_length:.0f}s")
+            else:
+                server.set_now_playing(*step)
+                changes.append((step[1], time.monotonic()))
+            time.sleep(args.track_length)
+        output, _ = app.communicate("stop\n", timeout=30)
+        elapsed = time.monotonic() - start
+        result = json.loads(output.strip().splitlines()[-1])
+
+        latencies = []
+        for title, changed_at in changes:
+            shown_at = discord.first_activity_after(changed_at, title)
+            if shown_at is None:
+                print(f"  {title:<10} never shown")
+                continue
+            latencies.append(shown_at - changed_at)
+            print(f"  {title:<10} shown after {latencies[-1]:6.2f}s")
+
+        api_calls = sum(server.api_calls.values())
+        pages = server.stats["requests"] - api_calls
+
+    print(f"\nTrack change to presence: median {statistics.median(latencies):.2f}s, "
+          f"max {max(latencies):.2f}s ({len(latencies)}/{len(changes)} shown)")
+    print(f"Requests per track change: {api_calls / len(changes):.1f} web service "
+          f"({dict(server.api_calls)}), {pages / len(changes):.1f} pages")
+    print(f"Activities sent: {result['updates_sent']} (skipped unchanged: {result['updates_skipped']}), "
+          f"Discord connections: {discord.connections}")
+    print(f"CPU: {result['cpu']:.2f}s over {elapsed:.0f}s = {result['cpu'] / elapsed * 3600:.1f} s/hour")
+
+if __name__ == "__main__":
+    main()
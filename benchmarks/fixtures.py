@@ -0,0 +1,152 @@
+"""
+Synthetic Last.fm page and web service fixtures for the offline benchmarks.
+
+The pages are generated, not saved from last.fm: the benchmarks must run
+without network access, and real pages carry a user's name, avatar and
+listening history. They mimic the structure of the live profile and
+library pages: a large head, deeply nested navigation, chart tables and
+the handful of elements the scrapers actually read, with the same class
+names and nesting. Sizes are in the same range as the live pages (roughly
+200-400 KB of markup). That is what parse cost depends on: a full DOM
+build scales with the number of tags, and a targeted parse still tokenizes
+every byte but only builds the matched elements. To check the numbers
+against real markup, pass pages saved from a browser to
+``benchmarks.html_parse``.
+"""
+import hashlib
+import random
+
+PAGE_FILLER_ROWS = 400
+
+def _filler(rng: random.Random, rows: int) -> str:
+    """Builds chart-table style markup that the scrapers never read."""
+    parts = ['<table class="chartlist"><tbody>']
+    for i in range(rows):
+        artist = f"Artist {rng.randint(1, 5000)}"
+        title = f"Track {rng.randint(1, 90000)}"
+        parts.append(
+            f'<tr class="chartlist-row" data-index="{i}">'
+            f'<td class="chartlist-index">{i + 1}</td>'
+            f'<td class="chartlist-image"><a href="/music/{artist}"><img src="https://lastfm.freetls.fastly.net/i/u/64s/{rng.getrandbits(64):016x}.jpg" alt="{artist}" loading="lazy"></a></td>'
+            f'<td class="chartlist-name"><a href="/music/{artist}/_/{title}" title="{title}">{title}</a></td>'
+            f'<td class="chartlist-artist"><a href="/music/{artist}">{artist}</a></td>'
+            f'<td class="chartlist-bar"><span class="chartlist-count-bar"><span class="chartlist-count-bar-value">{rng.randint(1, 999):,} <span class="stat-name">scrobbles</span></span></span></td>'
+            f'<td class="chartlist-timestamp"><span title="Sunday 1 Jan 2026, 12:00am">{rng.randint(1, 59)} minutes ago</span></td>'
+            '</tr>'
+        )
+    parts.append('</tbody></table>')
+    return "".join(parts)
+
+def _head(title: str, image_url: str) -> str:
+    scripts = "".join(f'<script src="/static/js/chunk-{i}.js" defer></script>' for i in range(40))
+    styles = "".join(f'<link rel="stylesheet" href="/static/css/chunk-{i}.css">' for i in range(20))
+    return (
+        f'<head><meta charset="utf-8"><title>{title} | Last.fm</title>'
+        f'<meta property="og:title" content="{title}">'
+        f'<meta property="og:image" content="{image_url}">'
+        f'<meta name="twitter:card" content="summary">{styles}{scripts}</head>'
+    )
+
+def _nav() -> str:
+    links = "".join(f'<li class="nav-item"><a class="nav-link" href="/section/{i}">Section {i}</a></li>' for i in range(60))
+    return f'<header class="masthead"><nav><ul class="nav-list">{links}</ul></nav></header>'
+
+def profile_page(username: str = "benchuser", display_name: str = "Bench User",
+                 scrobbles: int = 123456, artists: int = 4321, loved: int = 987,
+                 avatar_id: str = "2a96cbd8b46e442fc41c2b86b821562f", seed: int = 1) -> str:
+    """Returns a profile page with the header title, counters and og:image."""
+    rng = random.Random(seed)
+    image = f"https://lastfm.freetls.fastly.net/i/u/avatar170s/{avatar_id}.png"
+    header = (
+        '<div class="header-title-label-wrap"><h1 class="header-title">'
+        f'<span class="header-title-display-name">{display_name}</span>'
+        f'<span class="header-title-secondary">@{username}</span></h1></div>'
+        '<ul class="header-metadata">'
+        f'<li class="header-metadata-item"><h4 class="header-metadata-title">Scrobbles</h4><div class="header-metadata-display"><a href="/user/{username}/library">{scrobbles:,}</a></div></li>'
+        f'<li class="header-metadata-item"><h4 class="header-metadata-title">Artists</h4><div class="header-metadata-display"><a href="/user/{username}/library/artists">{artists:,}</a></div></li>'
+        f'<li class="header-metadata-item"><h4 class="header-metadata-title">Loved Tracks</h4><div class="header-metadata-display"><a href="/user/{username}/loved">{loved:,}</a></div></li>'
+        '</ul>'
+    )
+    body = f'<body>{_nav()}<div class="container"><div class="header-info">{header}</div>{_filler(rng, PAGE_FILLER_ROWS)}</div></body>'
+    return f'<!DOCTYPE html><html lang="en">{_head(display_name, image)}{body}</html>'
+
+def library_page(count: int = 42, title: str = "Library", seed: int = 2) -> str:
+    """Returns a library artist/track page with a single metadata-display count."""
+    rng = random.Random(seed)
+    metadata = (
+        '<ul class="metadata-list"><li class="metadata-item">'
+        '<h4 class="metadata-title">Scrobbles</h4>'
+        f'<p class="metadata-display">{count:,}</p></li></ul>'
+    ) if count else ''
+    body = f'<body>{_nav()}<div class="container"><div class="library-header">{metadata}</div>{_filler(rng, PAGE_FILLER_ROWS)}</div></body>'
+    image = "https://lastfm.freetls.fastly.net/i/u/300x300/c6f59c1e5e7240a4c0d427abd71f3dbb.jpg"
+    return f'<!DOCTYPE html><html lang="en">{_head(title, image)}{body}</html>'
+
+# --- Web service (ws.audioscrobbler.com/2.0/) responses ---------------------
+#
+# A track is a dict with 'artist', 'title', 'album' and 'duration' (ms);
+# history entries additionally carry 'uts'.
+
+IMAGE_SIZES = ("small", "medium", "large", "extralarge")
+IMAGE_PATHS = {"small": "34s", "medium": "64s", "large": "174s", "extralarge": "300x300"}
+
+def image_id(*parts) -> str:
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+def image_list(*parts) -> list:
+    """Last.fm style image list (small ... extralarge) for an album/artist."""
+    hash_id = image_id(*parts)
+    return [
+        {"size": size, "#text": f"https://lastfm.freetls.fastly.net/i/u/{IMAGE_PATHS[size]}/{hash_id}.jpg"}
+        for size in IMAGE_SIZES
+    ]
+
+def _recent_track_json(track: dict, now_playing: bool) -> dict:
+    node = {
+        "artist": {"name": track["artist"], "url": f"https://www.last.fm/music/{track['artist']}", "image": image_list(track["artist"])},
+        "name": track["title"],
+        "album": {"mbid": "", "#text": track.get("album") or ""},
+        "image": image_list(track["artist"], track.get("album") or "") if track.get("album") else [{"size": s, "#text": ""} for s in IMAGE_SIZES],
+        "url": f"https://www.last.fm/music/{track['artist']}/_/{track['title']}",
+        "loved": "0",
+    }
+    if now_playing:
+        node["@attr"] = {"nowplaying": "true"}
+    else:
+        node["date"] = {"uts": str(track.get("uts", 0)), "#text": ""}
+    return node
+
+def recent_tracks_json(user: str, now_playing, history: list, limit: int) -> dict:
+    tracks = ([_recent_track_json(now_playing, True)] if now_playing else [])
+    tracks += [_recent_track_json(t, False) for t in reversed(history)]
+    tracks = tracks[:max(limit, 1) + (1 if now_playing else 0)]
+    return {"recenttracks": {"track": tracks, "@attr": {"user": user, "page": "1", "perPage": str(limit), "total": str(len(history))}}}
+
+def track_info_json(track: dict) -> dict:
+    info = {"name": track["title"], "duration": str(track.get("duration", 0)), "artist": {"name": track["artist"]}}
+    if track.get("album"):
+        info["album"] = {"artist": track["artist"], "title": track["album"], "image": image_list(track["artist"], track["album"])}
+    return {"track": info}
+
+def album_info_json(artist: str, album: str, tracklist: list) -> dict:
+    return {"album": {
+        "name": album, "artist": artist,
+        "image": image_list(artist, album),
+        "tracks": {"track": [
+            {"name": t["title"], "duration": t.get("duration", 0) // 1000, "@attr": {"rank": i + 1}, "artist": {"name": artist}}
+            for i, t in enumerate(tracklist)
+        ]},
+    }}
+
+def artist_info_json(artist: str) -> dict:
+    return {"artist": {"name": artist, "image": image_list(artist)}}
+
+def user_info_json(user: str, scrobbles: int = 123456, artists: int = 4321) -> dict:
+    """user.getInfo with the same counters as the default profile_page."""
+    return {"user": {"name": user, "realname": "Bench User", "playcount": str(scrobbles),
+                     "artist_count": str(artists), "image": image_list(user), "url": f"https://www.last.fm/user/{user}"}}
+
+def loved_tracks_json(user: str, loved: int = 987) -> dict:
+    """user.getLovedTracks (limit=1): only the total matters."""
+    return {"lovedtracks": {"track": [], "@attr": {"user": user, "page": "1", "perPage": "1",
+                                                   "totalPages": str(loved), "total": str(loved)}}}
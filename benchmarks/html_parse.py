@@ -0,0 +1,73 @@
+"""
+Parse time and peak memory: full html.parser DOM vs targeted extraction.
+
+Runs the profile and library scrapers' parse step over the synthetic page
+fixtures (see benchmarks.fixtures), or over pages saved from last.fm with
+``--profile-page`` and ``--library-page``, and checks that every strategy
+extracts the same values.
+
+Usage:
+    python -m benchmarks.html_parse [--rounds 20] [--profile-page user.html] [--library-page track.html]
+"""
+import argparse
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from benchmarks import fixtures
+from utils.html_utils import HTML_PARSER, LIBRARY_COUNT_FILTER, PROFILE_HEADER_FILTER
+from api.lastfm.user.library import parse_count
+from api.lastfm.user.profile import parse_user_display_name, parse_user_avatar_url, parse_user_header_status
+
+def _extract_profile(dom) -> tuple:
+    return parse_user_display_name(dom), parse_user_avatar_url(dom), tuple(parse_user_header_status(dom))
+
+def _page(path, fixture) -> bytes:
+    """Reads a saved page, or renders the fixture if no path was given."""
+    if not path:
+        return fixture().encode()
+    with open(path, "rb") as f:
+        return f.read()
+
+def _measure(markup: bytes, parser: str, parse_only, extract, rounds: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        value = extract(BeautifulSoup(markup, parser, parse_only=parse_only))
+    elapsed = (time.perf_counter() - start) / rounds
+
+    tracemalloc.start()
+    extract(BeautifulSoup(markup, parser, parse_only=parse_only))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--profile-page", help="a saved last.fm profile page to use instead of the fixture")
+    parser.add_argument("--library-page", help="a saved last.fm library artist/track page to use instead of the fixture")
+    args = parser.parse_args()
+
+    pages = (
+        ("profile", _page(args.profile_page, fixtures.profile_page), PROFILE_HEADER_FILTER, _extract_profile),
+        ("library", _page(args.library_page, lambda: fixtures.library_page(count=1234)),
+         LIBRARY_COUNT_FILTER, parse_count),
+    )
+    strategies = [("full html.parser", "html.parser", False), ("targeted html.parser", "html.parser", True)]
+    if HTML_PARSER != "html.parser":
+        strategies.append((f"targeted {HTML_PARSER}", HTML_PARSER, True))
+
+    for name, markup, target_filter, extract in pages:
+        print(f"\n{name} page ({len(markup) / 1024:.0f} KB)")
+        baseline = None
+        for label, tree_builder, targeted in strategies:
+            value, elapsed, peak = _measure(markup, tree_builder, target_filter if targeted else None, extract, args.rounds)
+            if baseline is None:
+                baseline = (value, elapsed, peak)
+            assert value == baseline[0], f"{label} extracted {value!r}, expected {baseline[0]!r}"
+            print(f"  {label:<22} {elapsed * 1000:8.2f} ms ({baseline[1] / elapsed:5.1f}x) | "
+                  f"peak {peak / 1024:9.0f} KB ({baseline[2] / peak:5.1f}x less)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-track fetch latency: bare ``requests.get`` vs the shared pooled session.
+
+Each simulated track change performs the same three page fetches the RPC
+does (profile, library artist, library track) against the local stand-in.
+
+Usage:
+    python -m benchmarks.http_session [--tracks 30] [--latency-ms 40] [--handshake-ms 80]
+"""
+import argparse
+import statistics
+import time
+
+import requests
+
+from benchmarks.standin import StandInServer
+from utils.request_utils import get_response, close_session
+
+def _track_urls(base_url: str, i: int) -> list:
+    user = f"{base_url}/user/benchuser"
+    return [
+        user,
+        f"{user}/library/music/+noredirect/Artist{i}",
+        f"{user}/library/music/+noredirect/Artist{i}/_/Track{i}",
+    ]
+
+def _run(fetch, base_url: str, tracks: int) -> list:
+    timings = []
+    for i in range(tracks):
+        start = time.perf_counter()
+        for url in _track_urls(base_url, i):
+            fetch(url).content
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def _report(label: str, timings: list, stats: dict):
+    ms = sorted(t * 1000 for t in timings)
+    p95 = ms[int(len(ms) * 0.95) - 1] if len(ms) > 1 else ms[0]
+    print(f"{label:<16} mean {statistics.mean(ms):8.1f} ms | p50 {statistics.median(ms):8.1f} ms | "
+          f"p95 {p95:8.1f} ms | connections {stats['connections']:4d} | bytes {stats['bytes_sent']:,}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=30)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="per-request server latency")
+    parser.add_argument("--handshake-ms", type=float, default=80.0, help="per-connection setup cost (TCP + TLS)")
+    args = parser.parse_args()
+
+    results = {}
+    for label, fetch in (
+        ("bare requests", requests.get),
+        ("pooled session", get_response),
+    ):
+        with StandInServer(args.latency_ms / 1000, args.handshake_ms / 1000) as server:
+            timings = _run(fetch, server.base_url, args.tracks)
+            _report(label, timings, server.stats)
+            results[label] = statistics.mean(timings)
+        close_session()
+
+    before, after = results["bare requests"], results["pooled session"]
+    print(f"\nPer-track latency reduced by {(1 - after / before) * 100:.1f}% ({before * 1000:.1f} ms -> {after * 1000:.1f} ms)")
+
+if __name__ == "__main__":
+    main()
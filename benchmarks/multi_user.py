@@ -0,0 +1,99 @@
+"""
+CPU and memory per followed user in the multi-account poller.
+
+Runs the MultiUserPoller for ``--duration`` seconds against the local
+stand-in, once per user count, each in a fresh process, and reports
+process CPU time and resident memory. The marginal cost per additional
+user is compared with running one full process per user.
+
+Usage:
+    python -m benchmarks.multi_user [--users 1 10 50 100] [--duration 30]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+def rss_mb() -> float:
+    """Current resident set size in MB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is the peak, in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def _child(users: int, duration: float, api_url: str):
+    import constants.project as project
+    import api.lastfm.metadata as metadata
+    from core.multi_poller import MultiUserPoller
+
+    project.API_KEY = project.API_KEY or "benchmark"
+    project.LASTFM_API_URL = api_url
+
+    async def run():
+        poller = MultiUserPoller([f"user{i}" for i in range(users)], on_change=lambda *args: None)
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(duration, stop.set)
+        await poller.run(stop)
+        return poller.stats()
+
+    with tempfile.TemporaryDirectory() as directory:
+        metadata._metadata_cache = metadata.TrackMetadataCache(os.path.join(directory, "cache.sqlite3"))
+        rss_before = rss_mb()
+        cpu_before = time.process_time()
+        stats = asyncio.run(run())
+        result = {
+            "users": users,
+            "cpu": time.process_time() - cpu_before,
+            "rss": rss_mb(),
+            "rss_before": rss_before,
+            "polls": stats["polls"],
+        }
+    print(json.dumps(result))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50, 100], help="user counts to measure")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to poll per run")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return _child(args.child, args.duration, args.api_url)
+
+    from benchmarks.standin import StandInServer
+
+    results = []
+    with StandInServer(latency=0.05) as server:
+        server.set_now_playing("Bench Artist", "Bench Track", "Bench Album", 45000)
+        for users in args.users:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.multi_user", "--child", str(users),
+                 "--duration", str(args.duration), "--api-url", server.api_url],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            print(f"{users:4d} users: {result['polls']:5d} polls | CPU {result['cpu']:6.2f} s | RSS {result['rss']:6.1f} MB")
+
+    base = results[0]
+    for result in results[1:]:
+        extra = result["users"] - base["users"]
+        cpu = (result["cpu"] - base["cpu"]) / extra
+        rss = (result["rss"] - base["rss"]) / extra
+        print(f"{result['users']:4d} users: +{cpu * 1000:6.1f} ms CPU and +{rss * 1024:7.1f} KB RSS per additional user "
+              f"(one process per user: {result['users'] * base['rss']:7.1f} MB vs {result['rss']:6.1f} MB shared)")
+
+if __name__ == "__main__":
+    main()
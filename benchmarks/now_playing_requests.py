@@ -0,0 +1,91 @@
+"""
+Web service requests per track change: pylast resolution vs getRecentTracks
+with the track metadata cache.
+
+Plays a short session against the local stand-in: ``--tracks`` distinct
+tracks from albums of four tracks each, then the same tracks again, with
+``--polls`` polls per track. Counts the API calls each resolver makes on top
+of polling.
+
+The legacy resolver replays the calls the pylast-based ``User`` made for
+the same session: ``user.getRecentTracks`` on every poll, then
+``album.getInfo`` for the cover and ``track.getInfo`` for the duration on
+every new track. The current resolver runs once with an empty metadata
+cache and once more as a restarted app reusing the persisted cache.
+
+Usage:
+    python -m benchmarks.now_playing_requests [--tracks 12] [--polls 5]
+"""
+import argparse
+import os
+import tempfile
+
+import constants.project as project
+import api.lastfm.metadata as metadata
+from api.lastfm.client import call_method
+from api.lastfm.user.tracking import User
+from benchmarks.standin import StandInServer
+
+ALBUM_SIZE = 4
+
+class LegacyUser:
+    """The call sequence of the previous pylast-based User.now_playing."""
+
+    def __init__(self, username):
+        self.username = username
+        self.last_track = None
+
+    def now_playing(self):
+        data = call_method("user.getRecentTracks", user=self.username, limit=1)
+        track = data["recenttracks"]["track"][0]
+        key = (track["artist"]["name"], track["name"])
+        if key != self.last_track:
+            # Album.get_cover_image() and Track.get_duration()
+            call_method("album.getInfo", artist=key[0], album=track["album"]["#text"])
+            call_method("track.getInfo", artist=key[0], track=key[1])
+            self.last_track = key
+
+def _catalog(count: int):
+    return [(f"Artist {i // ALBUM_SIZE}", f"Track {i}", f"Album {i // ALBUM_SIZE}", 180000 + i * 1000)
+            for i in range(count)]
+
+def _run(user, catalog, polls: int) -> dict:
+    with StandInServer() as server:
+        project.LASTFM_API_URL = server.api_url
+        for track in catalog:
+            server.add_track(*track)
+        for track in catalog + catalog:
+            server.set_now_playing(*track)
+            for _ in range(polls):
+                user.now_playing()
+        calls = dict(server.api_calls)
+    return {"calls": calls, "total": sum(calls.values())}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", type=int, default=12, help="distinct tracks, each played twice")
+    parser.add_argument("--polls", type=int, default=5, help="now-playing polls per track")
+    args = parser.parse_args()
+
+    catalog = _catalog(args.tracks)
+    changes = 2 * len(catalog)
+    polls = changes * args.polls
+    project.API_KEY = project.API_KEY or "benchmark"
+
+    with tempfile.TemporaryDirectory() as directory:
+        metadata._metadata_cache = metadata.TrackMetadataCache(os.path.join(directory, "cache.sqlite3"))
+        runs = (
+            ("pylast calls", lambda: LegacyUser("benchuser")),
+            ("cold cache", lambda: User("benchuser")),
+            ("after restart", lambda: User("benchuser")),
+        )
+        for label, make_user in runs:
+            result = _run(make_user(), catalog, args.polls)
+            extra = result["total"] - polls
+            breakdown = ", ".join(f"{method} {count}" for method, count in sorted(result["calls"].items()))
+            print(f"{label:<14} {extra / changes:4.2f} requests per track change on top of polling "
+                  f"({result['total']} total for {changes} changes, {polls} polls: {breakdown})")
+        print(f"metadata cache: {metadata.get_metadata_cache().stats()}")
+
+if __name__ == "__main__":
+    main()
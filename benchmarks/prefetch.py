@@ -0,0 +1,109 @@
+"""
+Next-track prefetch: stats latency on track change with and without it.
+
+Plays a session against the local stand-in (with ``--latency`` per
+request): ``--albums`` albums of four tracks in tracklist order, then a
+fixed shuffled playlist of the same tracks twice, the second time after
+the cached scrobble counts expired (as on the next day). On every track
+change it times what the presence update waits for: resolving the
+now-playing track and fetching the library counts and profile
+(DiscordRPC's stats lookup).
+
+With prefetching, the prefetcher is told each track is about to end before
+the next one starts, and its background work is awaited, as it would have
+finished during the last seconds of the track. Album order is predicted
+from the cached tracklist, the playlist from the learned transitions (its
+first pass has none yet). Each run starts with empty caches.
+
+Usage:
+    python -m benchmarks.prefetch [--albums 3] [--latency 0.05]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import constants.project as project
+import api.lastfm.client as client
+import api.lastfm.metadata as metadata
+import api.lastfm.user.library as library
+import api.lastfm.user.profile as profile
+from api.discord.rpc import DiscordRPC
+from api.lastfm.user.tracking import User
+from benchmarks.standin import StandInServer
+from core.prefetcher import NextTrackPrefetcher
+from utils.rate_limiter import RateLimiter
+
+ALBUM_SIZE = 4
+USERNAME = "benchuser"
+
+def _session(albums: int) -> list:
+    catalog = [(f"Artist {i // ALBUM_SIZE}", f"Track {i}", f"Album {i // ALBUM_SIZE}", 180000)
+               for i in range(albums * ALBUM_SIZE)]
+    playlist = random.Random(0).sample(catalog, len(catalog))
+    # (name, tracks, whether the library counts expired before it)
+    return [("album order", catalog, False), ("playlist", playlist, False), ("playlist again", playlist, True)]
+
+def _run(server, session, prefetch: bool) -> dict:
+    # Fresh caches: the cache singletons reopen under the new working directory
+    library._library_cache = metadata._metadata_cache = profile._profile_cache = None
+    user = User(USERNAME)
+    rpc = DiscordRPC()
+    prefetcher = NextTrackPrefetcher() if prefetch else None
+    latencies = {}
+    pages_before = server.stats["requests"] - sum(server.api_calls.values())
+    for name, tracks, expired in session:
+        if expired:
+            library.get_library_cache().clear()
+        for artist, title, album, duration in tracks:
+            server.set_now_playing(artist, title, album, duration)
+            start = time.perf_counter()
+            track, _ = user.now_playing()
+            rpc._get_metadata_with_cache(str(track), USERNAME, artist, title)
+            latencies.setdefault(name, []).append(time.perf_counter() - start)
+            if prefetcher:
+                future = prefetcher.on_poll(user, track, 0)
+                if future:
+                    future.result()
+    pages = server.stats["requests"] - sum(server.api_calls.values()) - pages_before
+    return {"latencies": latencies, "pages": pages,
+            "hits": prefetcher.hits if prefetcher else 0, "prefetches": prefetcher.prefetches if prefetcher else 0}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--albums", type=int, default=3, help="albums of four tracks in the session")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated Last.fm round trip in seconds")
+    args = parser.parse_args()
+
+    session = _session(args.albums)
+    changes = sum(len(tracks) for _, tracks, _ in session)
+    project.USERNAME, project.API_KEY = USERNAME, project.API_KEY or "benchmark"
+    # Real track changes are minutes apart, so the API rate limit never waits between them
+    client.rate_limiter = RateLimiter(1000, 1000)
+    root = os.getcwd()
+    results = {}
+    with StandInServer(latency=args.latency) as server:
+        project.LASTFM_API_URL = server.api_url
+        library.LASTFM_LIBRARY_URL = f"{server.base_url}/user/{{username}}/library"
+        profile.LASTFM_USER_URL = f"{server.base_url}/user/{{username}}"
+        for prefetch in (False, True):
+            with tempfile.TemporaryDirectory() as directory:
+                os.chdir(directory)
+                try:
+                    results[prefetch] = _run(server, session, prefetch)
+                finally:
+                    os.chdir(root)
+
+    print(f"Stats ready after a track change (median ms), {changes} changes:")
+    for name, _, _ in session:
+        before = statistics.median(results[False]["latencies"][name]) * 1000
+        after = statistics.median(results[True]["latencies"][name]) * 1000
+        print(f"  {name:<14} {before:7.1f} -> {after:7.1f}")
+    after = results[True]
+    print(f"Prefetched {after['prefetches']} tracks, {after['hits']} of {changes} changes predicted")
+    print(f"Pages scraped: {results[False]['pages']} -> {after['pages']}")
+
+if __name__ == "__main__":
+    main()
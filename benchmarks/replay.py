@@ -0,0 +1,355 @@
+"""
+Deterministic, accelerated replay of a recorded listening session.
+
+Record a session by starting the app with ``LASTFM_RPC_RECORD`` pointing at
+a file (``.jsonl`` or ``.jsonl.gz``); every Last.fm response and every
+activity sent to Discord is written there (see utils/session_recorder.py).
+For an offline recording, run ``benchmarks.end_to_end`` with the variable
+set.
+
+The replay runs the headless engine's poll cycle on a virtual clock that
+starts at the recording's start time: each cycle's wait is skipped instead
+of slept, the Discord send queue's rate window and the API rate limiter
+run on the same clock, and ``DiscordRPC`` takes its timestamps from it.
+HTTP requests are answered from the recording: the latest response for
+the URL recorded at or before the current virtual time. Discord is a stub
+that collects the payloads. Cache TTLs still use the wall clock.
+
+Reported:
+  - payloads: the activities produced, compared with the recorded ones
+    (``start``/``end`` ignored, they depend on poll timing)
+  - latency: virtual time from the first recorded poll that saw a new
+    track to the first replayed activity showing it
+  - throughput: poll cycles per CPU second of the replay itself
+
+Save a report with ``--save`` and compare a later version against it with
+``--baseline``: differing payloads, a latency increase over ``--latency-slack``
+seconds or a throughput drop over ``--tolerance`` are flagged and the script
+exits with status 1.
+
+Usage:
+    python -m benchmarks.replay SESSION.jsonl[.gz] [--save report.json] [--baseline report.json]
+"""
+import argparse
+import asyncio
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+IGNORED_FIELDS = ("start", "end")
+
+class VirtualClock:
+    """Unix and monotonic time that only move when advanced, with timers on that time."""
+
+    def __init__(self, epoch: float):
+        self.epoch = epoch
+        self.offset = 0.0
+        self._timers = []
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+
+    def time(self) -> float:
+        return self.epoch + self.offset
+
+    def monotonic(self) -> float:
+        return self.offset
+
+    def call_later(self, wait, callback):
+        """Timer factory for ActivitySendQueue: fires ``callback`` once the clock passes ``wait``."""
+        timer = _VirtualTimer(callback)
+        with self._lock:
+            heapq.heappush(self._timers, (self.offset + wait, next(self._order), timer))
+        return timer
+
+    def advance(self, seconds: float):
+        """Moves the clock forward, running the timers that come due on the way."""
+        target = self.offset + max(seconds, 0.0)
+        while True:
+            with self._lock:
+                if not self._timers or self._timers[0][0] > target:
+                    break
+                due, _, timer = heapq.heappop(self._timers)
+                self.offset = max(self.offset, due)
+            timer.fire()
+        with self._lock:
+            self.offset = target
+
+    sleep = advance
+
+class _VirtualTimer:
+    def __init__(self, callback):
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def fire(self):
+        if not self.cancelled:
+            self.callback()
+
+class ReplayAdapter(BaseAdapter):
+    """Answers requests from recorded exchanges, as of the virtual clock's current time."""
+
+    def __init__(self, exchanges, clock):
+        super().__init__()
+        self.clock = clock
+        self.misses = 0
+        self.served = 0
+        self._by_url = {}
+        for exchange in exchanges:
+            # A 304 carries no body; replays answer from the last full response instead
+            if exchange["status"] != 304:
+                self._by_url.setdefault(self._key(exchange["url"]), []).append(exchange)
+
+    @staticmethod
+    def _key(url):
+        """Path and query only: a session recorded against the stand-ins replays against the real hosts."""
+        from utils.session_recorder import strip_secrets
+        parts = urlsplit(strip_secrets(url))
+        return f"{parts.path}?{parts.query}"
+
+    def _lookup(self, url):
+        exchanges = self._by_url.get(self._key(url))
+        if not exchanges:
+            return None
+        now = self.clock.monotonic()
+        current = exchanges[0]
+        for exchange in exchanges:
+            if exchange["t"] > now:
+                break
+            current = exchange
+        return current
+
+    def send(self, request, **kwargs):
+        exchange = self._lookup(request.url)
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        response.headers = CaseInsensitiveDict()
+        if exchange is None:
+            self.misses += 1
+            response.status_code, response.reason, response._content = 404, "Not Recorded", b""
+            return response
+
+        self.served += 1
+        response.headers.update(exchange["headers"])
+        etag = exchange["headers"].get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            response.status_code, response.reason, response._content = 304, "Not Modified", b""
+        else:
+            response.status_code, response.reason = exchange["status"], "Recorded"
+            response._content = exchange["body"].encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+class StubPresence:
+    """Stands in for pypresence.Presence and keeps what would have been sent."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.sent = []
+
+    def connect(self):
+        pass
+
+    def update(self, **payload):
+        self.sent.append((self.clock.monotonic(), payload))
+
+    def clear(self):
+        pass
+
+    def close(self):
+        pass
+
+def load_recording(path: str):
+    opener = gzip.open if path.endswith(".gz") else open
+    header, exchanges, activities = None, [], []
+    with opener(path, "rt", encoding="utf-8") as lines:
+        for line in lines:
+            entry = json.loads(line)
+            if entry["type"] == "session":
+                header = entry
+            elif entry["type"] == "http":
+                exchanges.append(entry)
+            elif entry["type"] == "activity":
+                activities.append(entry)
+    if header is None:
+        raise ValueError(f"{path} is not a session recording (no header line)")
+    return header, exchanges, activities
+
+def _content(payload: dict) -> dict:
+    from utils.session_recorder import to_json
+    return json.loads(json.dumps({key: value for key, value in payload.items() if key not in IGNORED_FIELDS}, default=to_json))
+
+def _track_changes(exchanges):
+    """(virtual time, title) of the first recorded poll that saw each new now-playing track."""
+    changes, previous = [], None
+    for exchange in exchanges:
+        params = dict(parse_qsl(urlsplit(exchange["url"]).query))
+        if params.get("method") != "user.getRecentTracks" or exchange["status"] != 200:
+            continue
+        tracks = json.loads(exchange["body"]).get("recenttracks", {}).get("track", [])
+        if isinstance(tracks, dict):
+            tracks = [tracks]
+        playing = next((track for track in tracks if track.get("@attr", {}).get("nowplaying") == "true"), None)
+        key = (playing["artist"].get("name") or playing["artist"].get("#text"), playing["name"]) if playing else None
+        if key != previous and key is not None:
+            changes.append((exchange["t"], key[1]))
+        previous = key
+    return changes
+
+def replay(path: str) -> dict:
+    header, exchanges, recorded = load_recording(path)
+    end = max([entry["t"] for entry in exchanges + recorded], default=0.0)
+    clock = VirtualClock(header["started_at"])
+
+    import constants.project as project
+    project.USERNAME, project.API_KEY, project.API_SECRET = header["username"], "replay", ""
+    # Presence texts are translated, so replay in the recording's language
+    project.APP_LANG = header.get("lang") or "en-US"
+    project.LASTFM_API_URL = header["api_url"]
+    project.TRANSLATIONS
+
+    import api.lastfm.client as client
+    from utils.request_utils import get_session
+    from utils.rate_limiter import RateLimiter
+    from api.discord.rpc import DiscordRPC
+    from api.discord.send_queue import ActivitySendQueue
+    from api.lastfm.user.tracking import User
+    from core.engine import PresenceEngine
+    from core.scheduler import PollScheduler
+
+    adapter = ReplayAdapter(exchanges, clock)
+    get_session().mount("http://", adapter)
+    get_session().mount("https://", adapter)
+    client.rate_limiter = RateLimiter(project.LASTFM_API_RATE, project.LASTFM_API_BURST,
+                                      clock=clock.monotonic, sleep=clock.sleep)
+
+    root = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # CACHE_DB_PATH is relative: start from empty caches like a fresh install
+        os.chdir(directory)
+        try:
+            engine = PresenceEngine()
+            engine.scheduler = PollScheduler(clock=clock.monotonic)
+            engine.rpc = DiscordRPC(clock=clock.time)
+            engine.rpc.send_queue = ActivitySendQueue(engine.rpc._deliver, clock=clock.monotonic, timer=clock.call_later)
+            presence = engine.rpc.RPC = StubPresence(clock)
+            user = User(project.USERNAME)
+            asyncio.set_event_loop(engine.loop)
+
+            # The first poll goes out when the recorded app made its first request
+            clock.advance(min((entry["t"] for entry in exchanges), default=0.0))
+            cycles = []
+            cpu_before = time.process_time()
+            wall_before = time.perf_counter()
+            while clock.monotonic() <= end:
+                started = time.perf_counter()
+                wait = engine.loop.run_until_complete(engine._perform_rpc_cycle(user, False))
+                if engine._status_task:
+                    engine.loop.run_until_complete(asyncio.gather(engine._status_task, return_exceptions=True))
+                cycles.append(time.perf_counter() - started)
+                clock.advance(wait)
+            cpu = time.process_time() - cpu_before
+            wall = time.perf_counter() - wall_before
+        finally:
+            os.chdir(root)
+
+    latencies = []
+    for changed_at, title in _track_changes(exchanges):
+        shown = next((sent_at for sent_at, payload in presence.sent
+                      if sent_at >= changed_at and payload.get("details") == title), None)
+        if shown is not None:
+            latencies.append(shown - changed_at)
+
+    replayed = [_content(payload) for _, payload in presence.sent]
+    expected = [_content(entry["payload"]) for entry in recorded]
+    return {
+        "recording": os.path.basename(path),
+        "recorded_version": header.get("version"),
+        "version": project.VERSION,
+        "duration": end,
+        "cycles": len(cycles),
+        "cpu": cpu,
+        "wall": wall,
+        "speedup": end / wall if wall else 0.0,
+        "cycles_per_cpu_second": len(cycles) / cpu if cpu else 0.0,
+        "cycle_p95_ms": statistics.quantiles(cycles, n=20)[-1] * 1000 if len(cycles) > 1 else 0.0,
+        "latencies": latencies,
+        "median_latency": statistics.median(latencies) if latencies else None,
+        "payloads": [dict(payload, t=sent_at) for (sent_at, _), payload in zip(presence.sent, replayed)],
+        "matches_recording": replayed == expected,
+        "unrecorded_requests": adapter.misses,
+    }
+
+def compare(report: dict, baseline: dict, tolerance: float, latency_slack: float) -> list:
+    """Returns the regressions of ``report`` against ``baseline``, as readable lines."""
+    problems = []
+    strip = lambda payloads: [{key: value for key, value in payload.items() if key != "t"} for payload in payloads]
+    current, previous = strip(report["payloads"]), strip(baseline["payloads"])
+    if current != previous:
+        first = next((i for i, (a, b) in enumerate(zip(current, previous)) if a != b), min(len(current), len(previous)))
+        problems.append(f"payloads differ: {len(current)} vs {len(previous)} sent, first difference at #{first}")
+    if report["median_latency"] is not None and baseline["median_latency"] is not None:
+        if report["median_latency"] > baseline["median_latency"] + latency_slack:
+            problems.append(f"median track change latency {report['median_latency']:.2f}s "
+                            f"vs {baseline['median_latency']:.2f}s")
+    if report["cycles_per_cpu_second"] < baseline["cycles_per_cpu_second"] * (1 - tolerance):
+        problems.append(f"throughput {report['cycles_per_cpu_second']:.0f} cycles/CPU s "
+                        f"vs {baseline['cycles_per_cpu_second']:.0f}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="session file written with LASTFM_RPC_RECORD")
+    parser.add_argument("--save", help="write the replay report to this JSON file")
+    parser.add_argument("--baseline", help="report of a previous version to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative throughput drop")
+    parser.add_argument("--latency-slack", type=float, default=0.5, help="allowed median latency increase in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    report = replay(args.recording)
+    print(f"Replayed {report['duration'] / 60:.1f} min in {report['wall']:.2f}s ({report['speedup']:.0f}x), "
+          f"{report['cycles']} poll cycles, {report['cycles_per_cpu_second']:.0f} cycles/CPU s, "
+          f"p95 cycle {report['cycle_p95_ms']:.1f} ms")
+    if report["median_latency"] is not None:
+        print(f"Track change to presence (virtual): median {report['median_latency']:.2f}s, "
+              f"max {max(report['latencies']):.2f}s over {len(report['latencies'])} changes")
+    print(f"Payloads: {len(report['payloads'])} sent, "
+          f"{'identical to' if report['matches_recording'] else 'different from'} the recording "
+          f"(made by version {report['recorded_version']})")
+    if report["unrecorded_requests"]:
+        print(f"{report['unrecorded_requests']} requests had no recorded response and got 404")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance, args.latency_slack)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Outage recovery: legacy fixed-interval retries vs backoff + circuit breaker.
+
+A client fetches a page once per ``--interval`` (as the update path does)
+while the local stand-in answers 503 for ``--outage`` seconds. Reports the
+longest a single call blocked, how long after the outage ended the first
+success arrived, and how many requests hit the failing server.
+
+Usage:
+    python -m benchmarks.retry_recovery [--outage 12] [--interval 1]
+"""
+import argparse
+import time
+
+import requests
+
+from benchmarks.standin import StandInServer
+from utils.request_utils import get_response, get_session
+from utils.retry_utils import reset_circuit_breakers
+
+LEGACY_RETRY_INTERVAL = 5
+LEGACY_MAX_RETRIES = 10
+
+def legacy_get_response(url):
+    """The previous behaviour: up to 10 attempts, 5 seconds apart."""
+    for _ in range(LEGACY_MAX_RETRIES):
+        try:
+            response = get_session().get(url)
+            response.raise_for_status()
+            return response
+        except requests.RequestException:
+            time.sleep(LEGACY_RETRY_INTERVAL)
+    raise requests.RequestException(url)
+
+def _run(fetch, outage: float, interval: float) -> dict:
+    reset_circuit_breakers()
+    with StandInServer() as server:
+        url = f"{server.base_url}/user/benchuser"
+        fetch(url)
+        outage_end = server.start_outage(outage)
+        requests_before = server.stats["requests"]
+
+        longest_call, first_success = 0.0, None
+        while first_success is None:
+            start = time.monotonic()
+            try:
+                fetch(url)
+                if start >= outage_end or time.monotonic() >= outage_end:
+                    first_success = time.monotonic()
+            except requests.RequestException:
+                pass
+            longest_call = max(longest_call, time.monotonic() - start)
+            time.sleep(interval)
+
+        return {
+            "longest_call": longest_call,
+            "recovery": first_success - outage_end,
+            "outage_requests": server.stats["failed"],
+            "total_requests": server.stats["requests"] - requests_before,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--outage", type=float, default=12.0, help="seconds the server answers 503")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between client fetches")
+    args = parser.parse_args()
+
+    for label, fetch in (("legacy retries", legacy_get_response), ("backoff + breaker", get_response)):
+        result = _run(fetch, args.outage, args.interval)
+        print(f"{label:<18} longest blocking call {result['longest_call']:6.2f} s | "
+              f"recovered {result['recovery']:6.2f} s after outage | "
+              f"{result['outage_requests']:3d} requests to failing server")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Local stand-in for www.last.fm used by the offline benchmarks.
+
+Serves the synthetic fixtures over HTTP/1.1 with keep-alive and gzip, and can
+simulate network cost: ``handshake_delay`` is paid once per new connection
+(TCP + TLS setup) and ``latency`` once per request. With ``etags`` enabled
+pages carry an ETag and matching conditional requests get 304 Not Modified.
+``start_outage`` makes the server answer 503 for a while.
+
+Requests to ``/2.0/`` are answered like the Last.fm web service (JSON) for
+the methods the app calls, from a now-playing state set with
+``set_now_playing``.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks import fixtures
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.stats["connections"] += 1
+        if self.server.handshake_delay:
+            time.sleep(self.server.handshake_delay)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _page_for(self, path: str) -> bytes:
+        if "/library/music/" in path:
+            is_track = "/_/" in path
+            return self.server.pages["track" if is_track else "artist"]
+        return self.server.pages["profile"]
+
+    def _api_response(self, params: dict) -> dict:
+        method = params.get("method", "")
+        self.server.api_calls[method] += 1
+        tracks = self.server.tracks
+        if method == "user.getRecentTracks":
+            return fixtures.recent_tracks_json(params.get("user", ""), self.server.now_playing,
+                                               self.server.history, int(params.get("limit", 50)))
+        if method == "track.getInfo":
+            key = (params.get("artist", "").casefold(), params.get("track", "").casefold())
+            if key in tracks:
+                return fixtures.track_info_json(tracks[key])
+        elif method == "album.getInfo":
+            album = [t for t in tracks.values()
+                     if t["artist"].casefold() == params.get("artist", "").casefold()
+                     and (t.get("album") or "").casefold() == params.get("album", "").casefold()]
+            if album:
+                return fixtures.album_info_json(album[0]["artist"], album[0]["album"], album)
+        elif method == "artist.getInfo":
+            return fixtures.artist_info_json(params.get("artist", ""))
+        elif method == "user.getInfo":
+            return fixtures.user_info_json(params.get("user", ""))
+        elif method == "user.getLovedTracks":
+            return fixtures.loved_tracks_json(params.get("user", ""))
+        else:
+            return {"error": 3, "message": "Invalid Method - No method with that name in this package"}
+        return {"error": 6, "message": "Track not found" if method == "track.getInfo" else "Album not found"}
+
+    def _send_api(self, params: dict):
+        data = self._api_response(params)
+        body = json.dumps(data).encode()
+        self.send_response(400 if "error" in data else 200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats["bytes_sent"] += len(body)
+
+    def do_GET(self):
+        self.server.stats["requests"] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if time.monotonic() < self.server.failing_until:
+            self.server.stats["failed"] += 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        url = urlsplit(self.path)
+        if url.path.startswith("/2.0"):
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            return self._send_api(params)
+
+        body = self._page_for(self.path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.server.etags and self.headers.get("If-None-Match") == etag:
+            self.server.stats["not_modified"] += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        if self.server.etags:
+            self.send_header("ETag", etag)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=5)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats["bytes_sent"] += len(body)
+
+class StandInServer:
+    """Runs the stand-in on a background thread; usable as a context manager."""
+
+    def __init__(self, latency: float = 0.0, handshake_delay: float = 0.0, etags: bool = False):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.handshake_delay = handshake_delay
+        self.httpd.etags = etags
+        self.httpd.failing_until = 0.0
+        self.httpd.stats = {"connections": 0, "requests": 0, "not_modified": 0, "failed": 0, "bytes_sent": 0}
+        self.httpd.pages = {
+            "profile": fixtures.profile_page().encode(),
+            "artist": fixtures.library_page(count=321, seed=3).encode(),
+            "track": fixtures.library_page(count=17, seed=4).encode(),
+        }
+        self.httpd.api_calls = Counter()
+        self.httpd.now_playing = None
+        self.httpd.history = []
+        self.httpd.tracks = {}
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> dict:
+        return self.httpd.stats
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/2.0/"
+
+    @property
+    def api_calls(self) -> Counter:
+        return self.httpd.api_calls
+
+    def set_now_playing(self, artist=None, title=None, album=None, duration=0):
+        """
+        Switches the playing track (``duration`` in ms); no arguments stops
+        playback. The previous track moves into the scrobble history.
+        """
+        httpd = self.httpd
+        if httpd.now_playing:
+            httpd.history.append(dict(httpd.now_playing, uts=int(time.time())))
+        if artist is None:
+            httpd.now_playing = None
+            return
+        httpd.now_playing = self.add_track(artist, title, album, duration)
+
+    def add_track(self, artist, title, album=None, duration=0) -> dict:
+        """Adds a track to the catalog track.getInfo and album.getInfo answer from."""
+        track = {"artist": artist, "title": title, "album": album, "duration": duration}
+        self.httpd.tracks[(artist.casefold(), title.casefold())] = track
+        return track
+
+    def start_outage(self, duration: float) -> float:
+        """Answers every request with 503 for ``duration`` seconds; returns the monotonic end time."""
+        self.httpd.failing_until = time.monotonic() + duration
+        return self.httpd.failing_until
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
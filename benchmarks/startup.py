@@ -0,0 +1,112 @@
+"""
+Cold start time, resident memory and time to first poll: tray app vs
+headless daemon.
+
+Each run is a fresh interpreter that imports and constructs the entry
+point's engine (App for the tray build, PresenceEngine for headless), then
+makes the first Last.fm poll against the local stand-in. It reports the
+construct time, the time from process start to the first poll result, RSS
+and whether any GUI toolkit got imported. The median of ``--runs`` runs is
+shown. Without a display the tray build uses pystray's dummy backend.
+
+The script exits with status 1 when the headless build imports a GUI
+toolkit or either build imports more modules than MODULE_BUDGET allows, so
+it guards startup regressions in CI (see .github/workflows/startup.yml).
+Both only depend on the code and the locked dependencies, not on how fast
+the machine is. Timings are reported; ``--budget`` ms additionally fails
+a median time to first poll over it, for runs on a known machine.
+
+Usage:
+    python -m benchmarks.startup [--runs 5] [--budget 1500]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+GUI_MODULES = ("pystray", "tkinter", "PIL")
+# Modules loaded up to the first poll, with room for stdlib differences between Python versions
+MODULE_BUDGET = {"tray": 520, "headless": 480}
+
+def _child(mode: str, api_url: str):
+    start = time.perf_counter()
+    if mode == "tray":
+        from core.application import App
+        App()
+    else:
+        from core.engine import PresenceEngine
+        PresenceEngine()
+    constructed = time.perf_counter() - start
+
+    import constants.project as project
+    from api.lastfm.user.tracking import User
+    project.LASTFM_API_URL = api_url
+    project.API_KEY = project.API_KEY or "benchmark"
+    User(project.USERNAME or "benchuser").now_playing()
+    first_poll = time.perf_counter() - start
+
+    from benchmarks.multi_user import rss_mb
+    print(json.dumps({
+        "startup": constructed,
+        "first_poll": first_poll,
+        "rss": rss_mb(),
+        "modules": len(sys.modules),
+        "gui": [name for name in GUI_MODULES if name in sys.modules],
+    }))
+
+def _measure(mode: str, api_url: str) -> dict:
+    env = dict(os.environ)
+    if sys.platform.startswith("linux") and not env.get("DISPLAY"):
+        env.setdefault("PYSTRAY_BACKEND", "dummy")
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child", mode, "--api-url", api_url],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per mode")
+    parser.add_argument("--budget", type=float, default=0,
+                        help="maximum median ms from process start to first poll, 0 (default) for no limit")
+    parser.add_argument("--child", choices=("tray", "headless"), help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return _child(args.child, args.api_url)
+
+    from benchmarks.standin import StandInServer
+
+    problems = []
+    with StandInServer(latency=0.05) as server:
+        server.set_now_playing("Bench Artist", "Bench Track", "Bench Album", 240000)
+        for mode in ("tray", "headless"):
+            runs = [_measure(mode, server.api_url) for _ in range(args.runs)]
+            median = lambda key: statistics.median(run[key] for run in runs)
+            gui = ", ".join(runs[-1]["gui"]) or "none"
+            print(f"{mode:<9} import + construct {median('startup') * 1000:6.0f} ms | "
+                  f"first poll after {median('first_poll') * 1000:6.0f} ms in-process, "
+                  f"~{median('process') * 1000:6.0f} ms whole process | RSS {median('rss'):5.1f} MB | "
+                  f"{runs[-1]['modules']} modules | GUI modules: {gui}")
+            if mode == "headless" and runs[-1]["gui"]:
+                problems.append(f"headless imported GUI modules: {gui}")
+            if runs[-1]["modules"] > MODULE_BUDGET[mode]:
+                problems.append(f"{mode} imported {runs[-1]['modules']} modules, budget {MODULE_BUDGET[mode]}")
+            # The whole process ends right after the first poll, so it bounds the time to first poll
+            if args.budget and median("process") * 1000 > args.budget:
+                problems.append(f"{mode} over the {args.budget:.0f} ms time-to-first-poll budget")
+
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Translation loading and messenger throughput: YAML files vs compiled catalog.
+
+Startup: a fresh interpreter loads one language, either by parsing its
+YAML file (the previous loader) or from translations/catalog.json (median
+of ``--runs``). Language switch: reparsing a YAML file vs activating a
+language already in the catalog. Throughput: calls per second of the
+previous messenger (lookup + str() of every argument + str.format) and of
+the current one (pre-parsed template, bound format), for a plain text, a
+one-field template and a list-argument template.
+
+Usage:
+    python -m benchmarks.translations [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import timeit
+
+LANGS = ("en-US", "es-ES", "tr-TR")
+
+LEGACY_PROBE = """
+import time; start = time.perf_counter()
+from utils.reader import load_translations
+load_translations("es-ES", "translations")
+print(time.perf_counter() - start)
+"""
+
+CATALOG_PROBE = """
+import time; start = time.perf_counter()
+from utils.translation_catalog import get_catalog
+get_catalog().set_language("es-ES")
+print(time.perf_counter() - start)
+"""
+
+def _cold(probe: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def legacy_messenger(translations, key, *args):
+    """The messenger before the catalog, minus its error handling."""
+    if not args:
+        return translations[key]
+    actual_args = args[0] if len(args) == 1 and isinstance(args[0], (list, tuple)) else args
+    return translations[key].format(*(str(arg) for arg in actual_args))
+
+def _rate(call, number=200_000) -> float:
+    return number / timeit.timeit(call, number=number)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per loader")
+    args = parser.parse_args()
+
+    from utils.translation_catalog import compile_catalog, write_catalog, get_catalog
+    write_catalog(compile_catalog())
+
+    legacy = _cold(LEGACY_PROBE, args.runs)
+    catalog = _cold(CATALOG_PROBE, args.runs)
+    print(f"Load one language in a fresh process: YAML {legacy * 1000:6.1f} ms | catalog {catalog * 1000:6.1f} ms "
+          f"({legacy / catalog:.1f}x)")
+
+    import constants.project as project
+    from utils.reader import load_translations
+    from utils.string_utils import messenger
+
+    switches = len(LANGS) * 20
+    yaml_switch = timeit.timeit(lambda: [load_translations(lang, project.TRANSLATIONS_DIR) for lang in LANGS], number=20) / switches
+    catalog_switch = timeit.timeit(lambda: [get_catalog().set_language(lang) for lang in LANGS], number=20) / switches
+    print(f"Switch language:                      YAML {yaml_switch * 1000:6.2f} ms | catalog {catalog_switch * 1000:6.3f} ms")
+
+    project.APP_LANG = "en-US"
+    get_catalog().set_language("en-US")
+    project.TRANSLATIONS = get_catalog().strings
+    translations = dict(project.TRANSLATIONS)
+    cases = [
+        ("plain text", ("no_track",)),
+        ("one field", ("now_playing", "Artist - Title")),
+        ("list arguments", ("rpc_scrobbles_total", [1234, 56])),
+    ]
+    for name, call_args in cases:
+        assert legacy_messenger(translations, *call_args) == messenger(*call_args)
+        before = _rate(lambda: legacy_messenger(translations, *call_args))
+        after = _rate(lambda: messenger(*call_args))
+        print(f"messenger, {name:<15} {before / 1e6:5.2f} M/s -> {after / 1e6:5.2f} M/s ({after / before:.1f}x)")
+
+if __name__ == "__main__":
+    main()
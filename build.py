@@ -21,11 +21,16 @@ def build():
         print("Cleaning old dist directory...")
         shutil.rmtree(output_dir)
     
-    # 2. Prepare paths
+    # 2. Compile the translation catalog so the app doesn't parse YAML at startup; a bad placeholder fails the build
+    from utils.translation_catalog import compile_catalog, write_catalog
+    write_catalog(compile_catalog(strict=True))
+    print("Compiled translation catalog")
+
+    # 3. Prepare paths
     main_script = "main.py"
     icon_path = os.path.join("assets", "last_fm.png")
     
-    # 3. Construct Nuitka command
+    # 4. Construct Nuitka command
     version = os.getenv('FILE_VERSION', '0.0.1').lstrip('v')
     
     # --standalone: All dependencies bundled
@@ -1,29 +1,57 @@
-from utils.reader import load_config, load_translations
+import threading
 
 # Paths
 TRANSLATIONS_DIR = "translations"
+TRANSLATIONS_CATALOG = "translations/catalog.json"
 ASSETS_DIR = "assets"
 APP_ICON_PATH = "assets/last_fm.png"
+CACHE_DB_PATH = "cache/lastfm.sqlite3"
 
-# These will be updated by reload_constants()
-USERNAME = ""
-API_KEY = ""
-API_SECRET = ""
-APP_LANG = "en-US"
-TRANSLATIONS = {}
+# USERNAME, API_KEY, API_SECRET, APP_LANG and TRANSLATIONS are loaded on first
+# access (see __getattr__) and updated by reload_constants()
+_CONFIG_NAMES = ("USERNAME", "API_KEY", "API_SECRET", "APP_LANG")
+_load_lock = threading.RLock()
 
-def reload_constants():
-    """Re-reads config.yaml and updates the global constants and translations."""
+def _load_config():
     global USERNAME, API_KEY, API_SECRET, APP_LANG
+    from utils.reader import load_config
     USERNAME, API_KEY, API_SECRET, APP_LANG = load_config()
-    
-    # Update translations in-place to preserve references in other modules
-    new_translations = load_translations(APP_LANG, TRANSLATIONS_DIR)
-    TRANSLATIONS.clear()
-    TRANSLATIONS.update(new_translations)
 
-# Perform initial load
-reload_constants()
+def _load_translations():
+    import logging
+    import sys
+    from utils.translation_catalog import get_catalog
+    if "APP_LANG" not in globals():
+        _load_config()
+    catalog = get_catalog()
+    try:
+        catalog.set_language(APP_LANG)
+    except KeyError:
+        logging.error(f"Could not load translations for language: {APP_LANG}")
+        sys.exit(1)
+
+    # The catalog updates this dict in place, so references in other modules stay valid
+    globals()["TRANSLATIONS"] = catalog.strings
+
+def reload_constants():
+    """Re-reads config.yaml and switches the translations to its language."""
+    from utils.translation_catalog import refresh_catalog
+    with _load_lock:
+        _load_config()
+        refresh_catalog()
+        _load_translations()
+
+def __getattr__(name):
+    """Reads config.yaml and the translation file the first time they are needed, not at import."""
+    if name in _CONFIG_NAMES or name == "TRANSLATIONS":
+        with _load_lock:
+            if name not in globals():
+                if name in _CONFIG_NAMES:
+                    _load_config()
+                else:
+                    _load_translations()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Project Info
 VERSION = "0.0.4"
@@ -38,20 +66,81 @@ RPC_LINE_LIMIT = 26
 RPC_XCHAR = ' '
 
 # Timings & Limits (Seconds)
-RETRY_INTERVAL = 5
-MAX_RETRIES = 10
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 4
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 15
 UPDATE_INTERVAL = 2
 TRACK_CHECK_INTERVAL = 5
 DEFAULT_COOLDOWN = 6
+UPDATE_DEBOUNCE_WINDOW = 0.4
+UPDATE_DEBOUNCE_MAX = 2
+RPC_UPDATE_INTERVAL = 15
+
+# Adaptive Polling (Seconds)
+POLL_MAX_INTERVAL = 30
+POLL_NEAR_END_WINDOW = 15
+POLL_NEAR_END_INTERVAL = 2
+POLL_OVERDUE_GRACE = 15
+IDLE_BACKOFF_STEP = 2 * 60
+IDLE_MAX_INTERVAL = 60
+POLL_RATE_LOG_INTERVAL = 10 * 60
+
+# HTTP Session (Seconds / Connections)
+REQUEST_CONNECT_TIMEOUT = 3.05
+REQUEST_READ_TIMEOUT = 10
+HTTP_POOL_CONNECTIONS = 4
+HTTP_POOL_MAXSIZE = 8
+VALIDATOR_CACHE_SIZE = 256
+
+# Last.fm API Rate Limit (Requests / Second, shared by all users in a process)
+LASTFM_API_RATE = 5
+LASTFM_API_BURST = 10
+
+# Library Scrobble Count Cache
+LIBRARY_CACHE_TTL = 60 * 60
+LIBRARY_CACHE_MAX_ENTRIES = 5000
+
+# Track & Album Metadata Cache
+TRACK_CACHE_TTL = 30 * 24 * 60 * 60
+TRACK_CACHE_MAX_ENTRIES = 5000
+ALBUM_CACHE_MAX_ENTRIES = 1000
+
+# Artwork (Discord shows the large image at up to 120 px, doubled on high-DPI screens)
+ARTWORK_MIN_PIXELS = 240
+ARTWORK_CACHE_MAX_ENTRIES = 2000
+
+# Next Track Prefetch (Seconds before the expected end of the current track)
+PREFETCH_LEAD_TIME = 20
+PREFETCH_MAX_CANDIDATES = 2
+PREFETCH_HISTORY_SIZE = 50
+PREFETCH_MAX_TRANSITIONS = 5000
+
+# Local Scrobble Counters & Profile Cache
+COUNTER_RECONCILE_INTERVAL = 30 * 60
+PROFILE_IDENTITY_TTL = 6 * 60 * 60
+
+# Metrics (Seconds; the scrape endpoint is off unless the environment variable names a port)
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_QUEUE_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 15, 30)
+METRICS_PORT_ENV = "LASTFM_RPC_METRICS_PORT"
+METRICS_HOST = "127.0.0.1"
+
+# Session Recording (off unless the environment variable names a file)
+RECORD_PATH_ENV = "LASTFM_RPC_RECORD"
 
 # Remote Assets
 DEFAULT_AVATAR_ID = "818148bf682d429dc215c1705eb27b98"
 DEFAULT_AVATAR_URL = f"https://lastfm.freetls.fastly.net/i/u/avatar170s/{DEFAULT_AVATAR_ID}.png"
+# The grey star Last.fm serves when an artist or album has no image
+LASTFM_PLACEHOLDER_IMAGE_ID = "2a96cbd8b46e442fc41c2b86b821562f"
 LASTFM_ICON_URL = "https://www.last.fm/static/images/lastfm_avatar_applemusic.b06eb8ad89be.png"
 DAY_MODE_COVER = 'https://i.imgur.com/GOVbNaF.png'
 NIGHT_MODE_COVER = 'https://i.imgur.com/kvGS4Pa.png'
 
 # URL Templates & Bases
+LASTFM_API_URL = "https://ws.audioscrobbler.com/2.0/"
 LASTFM_BASE_URL = "https://www.last.fm"
 LASTFM_USER_URL = f"{LASTFM_BASE_URL}/user/{{username}}"
 LASTFM_LIBRARY_URL = f"{LASTFM_USER_URL}/library"
@@ -4,6 +4,7 @@ import threading
 import webbrowser
 import sys
 import os
+from dataclasses import dataclass
 from tkinter import messagebox
 
 from pystray import Icon, Menu, MenuItem
@@ -11,33 +12,39 @@ from PIL import Image
 
 import constants.project as project
 from utils.string_utils import messenger
-from api.lastfm.user.tracking import User
-from api.discord.rpc import DiscordRPC
+from utils.metrics import get_metrics
+from core.engine import PresenceEngine
 
 logger = logging.getLogger('app')
 
-class App:
+@dataclass(frozen=True)
+class MenuState:
+    """What the dynamic tray entries show. Replaced as a whole, never mutated."""
+    track: str
+    artist_stats: str
+    discord_status: str
+
+class App(PresenceEngine):
+    """The presence engine with a system tray icon and settings window."""
+
     def __init__(self):
-        self.rpc = DiscordRPC()
-        self.current_track_name = messenger('no_track')
-        self._rpc_connected = False
+        super().__init__()
         self.debug_enabled = logging.getLogger().getEffectiveLevel() == logging.DEBUG
         
         # Initialize flags and states BEFORE UI setup
-        self.config_needs_reload = False
         self.latest_update = (False, None, None)
-        self.cached_track_data = None
-        self.update_event = threading.Event()
+
+        # The menu is only rebuilt when this key changes; see refresh_tray_menu
+        self._menu_structure = None
+        self._menu_lock = threading.Lock()
+        self.menu_state = self._snapshot_menu_state()
         
         self.icon_tray = self.setup_tray_icon()
-        self.loop = asyncio.new_event_loop()
-        self.rpc_thread = threading.Thread(target=self.run_rpc, args=(self.loop,))
-        self.rpc_thread.daemon = True
 
     def exit_app(self, icon, item):
         """Cleanly exits the application."""
         logger.info("Exiting application.")
-        self.rpc.disable()
+        self.shutdown()
         icon.stop()
         os._exit(0)
 
@@ -52,6 +59,8 @@ class App:
             handler.setLevel(new_level)
             
         logger.info(f"Logging level set to: {'DEBUG' if self.debug_enabled else 'INFO'}")
+        # Shows or hides the metrics submenu
+        self.refresh_tray_menu(options_changed=True)
 
     def open_profile(self, icon, item):
         """Opens the user's Last.fm profile in the default browser."""
@@ -77,7 +86,7 @@ class App:
             messagebox.showerror(messenger('err'), messenger('err_assets'))
             sys.exit(1)
 
-    def _get_dynamic_discord_status(self, item):
+    def _get_dynamic_discord_status(self, item=None):
         """Returns the current Discord status text for the menu."""
         is_connected = self.rpc.is_connected
         if is_connected and self.rpc.connection_time:
@@ -92,13 +101,11 @@ class App:
         current = getattr(self.rpc, option)
         setattr(self.rpc, option, not current)
         # Refresh UI
-        if self.icon_tray:
-            self.icon_tray.menu = self.setup_tray_menu()
+        self.refresh_tray_menu(options_changed=True)
             
         logger.info(f"Toggled option '{option}' to {not current}. Triggering update.")
         # Trigger immediate update
-        # Trigger immediate update
-        self.update_event.set()
+        self.request_update()
 
     def set_small_image_option(self, option):
         """Sets the active small image source (Radio Button behavior)."""
@@ -113,11 +120,10 @@ class App:
             setattr(self.rpc, opt, opt == option)
             
         # Refresh UI
-        if self.icon_tray:
-            self.icon_tray.menu = self.setup_tray_menu()
+        self.refresh_tray_menu(options_changed=True)
             
         logger.info(f"Set small image source to '{option}'. Triggering update.")
-        self.update_event.set()
+        self.request_update()
 
     def set_large_image_option(self, show_scrobbles):
         """Sets the mode for large image text (Radio Button behavior)."""
@@ -129,13 +135,12 @@ class App:
         self.rpc.show_artist_scrobbles_large = show_scrobbles
         
         # Refresh UI
-        if self.icon_tray:
-            self.icon_tray.menu = self.setup_tray_menu()
+        self.refresh_tray_menu(options_changed=True)
             
         logger.info(f"Set large image mode to {'Scrobbles' if show_scrobbles else 'Album Name'}. Triggering update.")
-        self.update_event.set()
+        self.request_update()
 
-    def _get_dynamic_artist_stats(self, item):
+    def _get_dynamic_artist_stats(self, item=None):
         """Returns the current artist scrobble stats for the menu."""
         # logger.debug(f"Menu stats check: Artist={self.rpc.current_artist}, Scrobbles={self.rpc.artist_scrobbles}")
         if self.rpc.current_artist:
@@ -147,8 +152,52 @@ class App:
             return messenger('stats_loading')
         return messenger('stats_idle')
 
+    def _metrics_menu_items(self):
+        """Read-only metrics summary lines, generated each time the submenu is built."""
+        for line in get_metrics().summary_lines():
+            yield MenuItem(line, None, enabled=False)
+
+    def _snapshot_menu_state(self):
+        return MenuState(
+            track=self.current_track_name,
+            artist_stats=self._get_dynamic_artist_stats(),
+            discord_status=self._get_dynamic_discord_status()
+        )
+
+    def _menu_structure_key(self):
+        """Everything that changes which items the menu has or their static labels."""
+        return (self.latest_update, project.USERNAME, project.APP_LANG)
+
+    def refresh_tray_menu(self, options_changed=False):
+        """
+        Brings the tray menu up to date. Safe to call from any thread.
+
+        Dynamic entries read from the MenuState snapshot and checkmarks from
+        the display options, so track, connection and option changes only
+        swap the snapshot and ask the backend to redraw. The menu is rebuilt
+        only when its structure changes (e.g. an update became available).
+        """
+        if not self.icon_tray:
+            return
+        with self._menu_lock:
+            state = self._snapshot_menu_state()
+            if self._menu_structure_key() != self._menu_structure:
+                self.menu_state = state
+                self.icon_tray.menu = self.setup_tray_menu()
+                return
+            if state == self.menu_state and not options_changed:
+                return
+            self.menu_state = state
+            try:
+                self.icon_tray.update_menu()
+            except NotImplementedError:
+                # Backends without menu updates read the entries when the menu opens
+                pass
+
     def setup_tray_menu(self):
-        """Creates and returns the tray menu with dynamic items."""
+        """Creates and returns the tray menu; dynamic entries are callables read on redraw."""
+        self._menu_structure = self._menu_structure_key()
+        small_image_enabled = lambda item: self.rpc.show_small_image
         dynamic_items = []
         
         # Add Update Item at the top if available
@@ -163,28 +212,28 @@ class App:
         return Menu(
             *dynamic_items,
             MenuItem(messenger('user', project.USERNAME), self.open_profile),
-            MenuItem(lambda item: self.current_track_name, None, enabled=False),
+            MenuItem(lambda item: self.menu_state.track, None, enabled=False),
             # Display stats item
             MenuItem(
-                self._get_dynamic_artist_stats, 
+                lambda item: self.menu_state.artist_stats,
                 None, 
                 enabled=False
             ),
-            MenuItem(self._get_dynamic_discord_status, None, enabled=False),
+            MenuItem(lambda item: self.menu_state.discord_status, None, enabled=False),
             Menu.SEPARATOR,
             
             # Small Image Options
             MenuItem(messenger('menu_small_image_options'), Menu(
                 MenuItem(messenger('menu_show_small_image'), lambda item: self.toggle_display_option('show_small_image'), checked=lambda item: self.rpc.show_small_image),
                 Menu.SEPARATOR,
-                MenuItem(messenger('menu_use_custom_profile_image'), lambda item: self.set_small_image_option('use_custom_profile_image'), checked=lambda item: self.rpc.use_custom_profile_image, enabled=self.rpc.show_small_image),
-                MenuItem(messenger('menu_use_default_icon'), lambda item: self.set_small_image_option('use_default_icon'), checked=lambda item: self.rpc.use_default_icon, enabled=self.rpc.show_small_image),
-                MenuItem(messenger('menu_use_lastfm_icon'), lambda item: self.set_small_image_option('use_lastfm_icon'), checked=lambda item: self.rpc.use_lastfm_icon, enabled=self.rpc.show_small_image),
+                MenuItem(messenger('menu_use_custom_profile_image'), lambda item: self.set_small_image_option('use_custom_profile_image'), checked=lambda item: self.rpc.use_custom_profile_image, enabled=small_image_enabled),
+                MenuItem(messenger('menu_use_default_icon'), lambda item: self.set_small_image_option('use_default_icon'), checked=lambda item: self.rpc.use_default_icon, enabled=small_image_enabled),
+                MenuItem(messenger('menu_use_lastfm_icon'), lambda item: self.set_small_image_option('use_lastfm_icon'), checked=lambda item: self.rpc.use_lastfm_icon, enabled=small_image_enabled),
                 Menu.SEPARATOR,
-                MenuItem(messenger('menu_show_username'), lambda item: self.toggle_display_option('show_username'), checked=lambda item: self.rpc.show_username, enabled=self.rpc.show_small_image),
-                MenuItem(messenger('menu_show_scrobbles'), lambda item: self.toggle_display_option('show_scrobbles'), checked=lambda item: self.rpc.show_scrobbles, enabled=self.rpc.show_small_image),
-                MenuItem(messenger('menu_show_artists'), lambda item: self.toggle_display_option('show_artists'), checked=lambda item: self.rpc.show_artists, enabled=self.rpc.show_small_image),
-                MenuItem(messenger('menu_show_loved'), lambda item: self.toggle_display_option('show_loved'), checked=lambda item: self.rpc.show_loved, enabled=self.rpc.show_small_image)
+                MenuItem(messenger('menu_show_username'), lambda item: self.toggle_display_option('show_username'), checked=lambda item: self.rpc.show_username, enabled=small_image_enabled),
+                MenuItem(messenger('menu_show_scrobbles'), lambda item: self.toggle_display_option('show_scrobbles'), checked=lambda item: self.rpc.show_scrobbles, enabled=small_image_enabled),
+                MenuItem(messenger('menu_show_artists'), lambda item: self.toggle_display_option('show_artists'), checked=lambda item: self.rpc.show_artists, enabled=small_image_enabled),
+                MenuItem(messenger('menu_show_loved'), lambda item: self.toggle_display_option('show_loved'), checked=lambda item: self.rpc.show_loved, enabled=small_image_enabled)
             )),
             
             # Large Image Options
@@ -197,6 +246,7 @@ class App:
             MenuItem(messenger('menu_settings'), self.open_settings),
             MenuItem(messenger('menu_check_updates'), self.check_updates_manual),
             MenuItem(messenger('debug_mode'), self.toggle_debug, checked=lambda item: self.debug_enabled),
+            MenuItem(messenger('menu_metrics'), Menu(self._metrics_menu_items), visible=lambda item: self.debug_enabled),
             MenuItem(messenger('exit'), self.exit_app)
         )
 
@@ -227,8 +277,8 @@ class App:
                 reload_constants()
                 
                 # Refresh UI and track
-                self.icon_tray.menu = self.setup_tray_menu()
                 self.current_track_name = messenger('no_track')
+                self.refresh_tray_menu()
                 self.config_needs_reload = True
                 
                 logger.info("Config updated and reloaded via GUI.")
@@ -266,100 +316,12 @@ class App:
             menu=self.setup_tray_menu()
         )
 
-    def _handle_active_track(self, current_track, data, is_forced_update=False):
-        """Handle the case where a track is playing."""
-        title, artist, album, artwork, time_remaining = data
-        formatted_track = f"{artist} - {title}"
-        new_track_display = messenger('now_playing', formatted_track)
-        
-        # 1. IMMEDIATE UI UPDATE
-        self.rpc.enable() 
-        
-        has_track_changed = self.current_track_name != new_track_display
-        has_conn_changed = self._rpc_connected != self.rpc.is_connected
-        
-        if has_track_changed or has_conn_changed:
-            self.current_track_name = new_track_display
-            self._rpc_connected = self.rpc.is_connected
-            logger.info(f"Status: {self.current_track_name} | Discord: {self._rpc_connected}")
-            self.icon_tray.title = f"{project.APP_NAME}\n{new_track_display}"
-        else:
-            logger.debug(f"Polling: {formatted_track}")
-
-        # 2. HEAVY DATA UPDATE
-        self.rpc.update_status(
-            str(current_track),
-            str(title),
-            str(artist),
-            str(album),
-            time_remaining,
-            project.USERNAME,
-            artwork,
-            force=is_forced_update
-        )
-        
-        # 3. Refresh menu if changed
-        if has_track_changed or has_conn_changed:
-            self.icon_tray.menu = self.setup_tray_menu()
-
-    def _handle_no_track(self):
-        """Handle the case where no track is playing."""
-        if self.current_track_name != messenger('no_track') or self._rpc_connected != self.rpc.is_connected:
-            self.current_track_name = messenger('no_track')
-            self._rpc_connected = self.rpc.is_connected
-            logger.info(f"Tray Update: No track detected | Discord: {self._rpc_connected}")
-            self.icon_tray.title = f"{project.APP_NAME}\n{self.current_track_name}"
-        self.rpc.disable()
-
-    def run_rpc(self, loop):
-        """Runs the RPC updater in a loop."""
-        logger.info(messenger('starting_rpc'))
-        asyncio.set_event_loop(loop)
-        
-        user = User(project.USERNAME)
-
-        while True:
-            # Check if config was reloaded via GUI
-            if self.config_needs_reload:
-                logger.info(f"Applying new configuration for user: {project.USERNAME}")
-                user = User(project.USERNAME)
-                self.config_needs_reload = False
-
-            # Check if this iteration was triggered by an event (settings change)
-            is_forced_update = self.update_event.is_set()
-            self.update_event.clear()
-            
-            try:
-                wait_time = self._perform_rpc_cycle(user, is_forced_update)
-                # Wait for next cycle or till an event is set
-                if self.update_event.wait(wait_time):
-                    continue
-            except Exception as e:
-                logger.error(f"Unexpected error in RPC loop: {e}", exc_info=True)
-                # Small cooldown after failure
-                self.update_event.wait(5)
+    def on_track_display_changed(self):
+        self.icon_tray.title = f"{project.APP_NAME}\n{self.current_track_name}"
+        self.refresh_tray_menu()
 
-    def _perform_rpc_cycle(self, user, is_forced_update):
-        """
-        Executes a single cycle of the RPC update process.
-        Returns the wait time for the next cycle.
-        """
-        # If forced update and we have cached data, reuse it without polling Last.fm
-        if is_forced_update and self.cached_track_data:
-            current_track, data = self.cached_track_data
-        else:
-            # Normal poll cycle
-            current_track, data = user.now_playing()
-            if data:
-                self.cached_track_data = (current_track, data)
-        
-        if data:
-            self._handle_active_track(current_track, data, is_forced_update)
-            return project.TRACK_CHECK_INTERVAL
-        else:
-            self._handle_no_track()
-            self.cached_track_data = None
-            return project.UPDATE_INTERVAL
+    def on_status_pushed(self):
+        self.refresh_tray_menu()
 
     def check_updates_manual(self, icon, item):
         """Check for updates manually and show a message box."""
@@ -368,7 +330,7 @@ class App:
         
         if is_avail:
             self.latest_update = (is_avail, ver_name, url)
-            self.icon_tray.menu = self.setup_tray_menu()
+            self.refresh_tray_menu()
             if messagebox.askyesno(messenger('menu_check_updates'), messenger('update_available', ver_name) + "\n\nDo you want to visit the download page?"):
                 if url:
                     webbrowser.open(url)
@@ -376,22 +338,22 @@ class App:
             messagebox.showinfo(messenger('menu_check_updates'), messenger('update_not_found'))
 
     def trigger_startup_update_check(self):
-        """Runs update check in a thread to not block startup."""
-        def run_check():
+        """Schedules the update check on the RPC loop so it does not block startup."""
+        async def run_check():
             try:
                 from utils.update_checker import check_for_updates
-                is_avail, ver_name, url = check_for_updates()
+                is_avail, ver_name, url = await asyncio.to_thread(check_for_updates)
                 if is_avail:
                     self.latest_update = (is_avail, ver_name, url)
                     if self.icon_tray:
-                        self.icon_tray.menu = self.setup_tray_menu()
+                        self.refresh_tray_menu()
                         # Optional: Show notification if frozen
                         if getattr(sys, 'frozen', False):
                              self.icon_tray.notify(messenger('update_available', ver_name), project.APP_NAME)
             except Exception as e:
                 logger.debug(f"Background update check failed: {e}")
         
-        threading.Thread(target=run_check, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(run_check(), self.loop)
 
     def _on_setup(self, icon):
         """Callback to start backend tasks once the icon is running."""
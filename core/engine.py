@@ -0,0 +1,255 @@
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import constants.project as project
+from utils.string_utils import messenger
+from utils.metrics import get_metrics, serve_metrics_from_env
+from api.lastfm.user.tracking import User
+from api.discord.rpc import DiscordRPC
+from core.scheduler import PollScheduler
+from core.prefetcher import NextTrackPrefetcher
+
+logger = logging.getLogger('app')
+
+class PresenceEngine:
+    """
+    Polls Last.fm and keeps the Discord presence in sync, without any UI.
+
+    Everything runs on the engine's own asyncio loop; blocking Discord IPC
+    goes through a single 'discord' worker thread. On its own the engine
+    only logs status changes (headless mode). App adds the tray icon by
+    overriding the on_track_display_changed and on_status_pushed hooks.
+    """
+
+    def __init__(self):
+        self.rpc = DiscordRPC()
+        self.current_track_name = messenger('no_track')
+        self._rpc_connected = False
+
+        self.config_needs_reload = False
+        self.cached_track_data = None
+        self.update_event = asyncio.Event()
+        self._status_task = None
+        self._status_cancelled = None
+        self.scheduler = PollScheduler()
+        self.prefetcher = NextTrackPrefetcher()
+
+        self.loop = asyncio.new_event_loop()
+        # Discord IPC is blocking; connecting and disconnecting run here, one at a time
+        self._rpc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='discord')
+        # Presence updates (stats scraping) run on their own thread so a slow
+        # scrape never holds up a (dis)connect; their sends go through the
+        # rate-limited queue, which takes DiscordRPC's I/O lock
+        self._presence_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='presence')
+        self.rpc_thread = threading.Thread(target=self.run_rpc, args=(self.loop,))
+        self.rpc_thread.daemon = True
+
+    def on_track_display_changed(self):
+        """Called on the loop when the shown track or Discord connection state changes."""
+
+    def on_status_pushed(self):
+        """Called on the loop after a presence update went through."""
+
+    def shutdown(self):
+        """Clears the Discord presence before exiting."""
+        if self._status_cancelled is not None:
+            self._status_cancelled.set()
+        try:
+            # Go through the Discord thread so we don't race an in-flight update
+            self._rpc_executor.submit(self.rpc.disable).result(timeout=2)
+        except Exception as e:
+            logger.warning(f"Failed to clear Discord presence on exit: {e}")
+
+    def run(self):
+        """Runs the engine in the calling thread until interrupted."""
+        try:
+            self.run_rpc(self.loop)
+        except KeyboardInterrupt:
+            logger.info("Exiting application.")
+        finally:
+            self.shutdown()
+
+    def request_update(self):
+        """Wakes the RPC loop for an immediate forced update. Safe to call from any thread."""
+        self.loop.call_soon_threadsafe(self.update_event.set)
+
+    async def _run_rpc_io(self, func, *args, **kwargs):
+        """Runs a blocking DiscordRPC call on the Discord thread without blocking the loop."""
+        return await self.loop.run_in_executor(self._rpc_executor, functools.partial(func, *args, **kwargs))
+
+    def _cancel_status_update(self):
+        """Cancels the in-flight presence update, if any."""
+        if self._status_cancelled is not None:
+            # Cancelling the task alone would leave the blocking call running
+            self._status_cancelled.set()
+            self._status_cancelled = None
+        if self._status_task and not self._status_task.done():
+            self._status_task.cancel()
+        self._status_task = None
+
+    async def _push_status(self, update_args, force, cancelled):
+        """Scrapes stats and sends the presence update, unless cancelled is set first."""
+        try:
+            with get_metrics().timed("presence_update"):
+                await self.loop.run_in_executor(self._presence_executor, functools.partial(
+                    self.rpc.update_status, *update_args, force=force, cancelled=cancelled
+                ))
+            self.on_status_pushed()
+        except asyncio.CancelledError:
+            logger.debug("Presence update superseded before completion.")
+            raise
+        except Exception as e:
+            logger.error(f"Failed to update presence: {e}", exc_info=True)
+
+    async def _handle_active_track(self, current_track, data, is_forced_update=False):
+        """Handle the case where a track is playing."""
+        title, artist, album, artwork, time_remaining = data
+        formatted_track = f"{artist} - {title}"
+        new_track_display = messenger('now_playing', formatted_track)
+        
+        # 1. IMMEDIATE UI UPDATE
+        if not self.rpc.is_connected:
+            await self._run_rpc_io(self.rpc.enable)
+        
+        has_track_changed = self.current_track_name != new_track_display
+        has_conn_changed = self._rpc_connected != self.rpc.is_connected
+        
+        if has_track_changed or has_conn_changed:
+            self.current_track_name = new_track_display
+            self._rpc_connected = self.rpc.is_connected
+            logger.info(f"Status: {self.current_track_name} | Discord: {self._rpc_connected}")
+            self.on_track_display_changed()
+        else:
+            logger.debug(f"Polling: {formatted_track}")
+
+        # 2. HEAVY DATA UPDATE (in the background, so polling continues meanwhile)
+        is_in_flight = self._status_task is not None and not self._status_task.done()
+        if is_in_flight and not (has_track_changed or has_conn_changed or is_forced_update):
+            return
+        # A newer track or a tray change preempts whatever update is still pending
+        self._cancel_status_update()
+
+        update_args = (
+            str(current_track),
+            str(title),
+            str(artist),
+            str(album),
+            time_remaining,
+            project.USERNAME,
+            artwork
+        )
+        # 3. Push the presence once the stats have arrived
+        self._status_cancelled = threading.Event()
+        self._status_task = self.loop.create_task(self._push_status(update_args, is_forced_update, self._status_cancelled))
+
+    async def _handle_no_track(self):
+        """Handle the case where no track is playing."""
+        self._cancel_status_update()
+        if self.rpc.is_connected:
+            await self._run_rpc_io(self.rpc.disable)
+        if self.current_track_name != messenger('no_track') or self._rpc_connected != self.rpc.is_connected:
+            self.current_track_name = messenger('no_track')
+            self._rpc_connected = self.rpc.is_connected
+            logger.info(f"Status: No track detected | Discord: {self._rpc_connected}")
+            self.on_track_display_changed()
+
+    def run_rpc(self, loop):
+        """Runs the RPC updater on the application's event loop."""
+        logger.info(messenger('starting_rpc'))
+        serve_metrics_from_env()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(self._rpc_main())
+
+    async def _rpc_main(self):
+        """Polls Last.fm and drives presence updates until cancelled."""
+        user = User(project.USERNAME)
+
+        try:
+            while True:
+                # Check if config was reloaded via GUI
+                if self.config_needs_reload:
+                    logger.info(f"Applying new configuration for user: {project.USERNAME}")
+                    user = User(project.USERNAME)
+                    self.scheduler.reset()
+                    self.config_needs_reload = False
+
+                # Check if this iteration was triggered by an event (settings change)
+                is_forced_update = self.update_event.is_set()
+                self.update_event.clear()
+
+                try:
+                    wait_time = await self._perform_rpc_cycle(user, is_forced_update)
+                except Exception as e:
+                    logger.error(f"Unexpected error in RPC loop: {e}", exc_info=True)
+                    # Small cooldown after failure
+                    wait_time = 5
+
+                # Wait for next cycle or till an event is set
+                try:
+                    await asyncio.wait_for(self.update_event.wait(), wait_time)
+                    await self._debounce_updates()
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._cancel_status_update()
+
+    async def _debounce_updates(self):
+        """
+        Lets a burst of option changes settle into a single forced update.
+
+        Waits until no request has arrived for UPDATE_DEBOUNCE_WINDOW seconds
+        (at most UPDATE_DEBOUNCE_MAX in total). The presence is built from the
+        options as they are once the burst ends, so the last change wins.
+        """
+        deadline = self.loop.time() + project.UPDATE_DEBOUNCE_MAX
+        coalesced = 0
+        while (remaining := deadline - self.loop.time()) > 0:
+            self.update_event.clear()
+            try:
+                await asyncio.wait_for(self.update_event.wait(), min(project.UPDATE_DEBOUNCE_WINDOW, remaining))
+            except asyncio.TimeoutError:
+                break
+            coalesced += 1
+        if coalesced:
+            logger.debug(f"Coalesced {coalesced + 1} update requests into one.")
+        # Leave the event set so the next cycle runs as a forced update
+        self.update_event.set()
+
+    def _poll_now_playing(self, user):
+        """Polls Last.fm, counting the scrobbles the poll revealed (runs off the loop)."""
+        result = user.now_playing()
+        self.rpc.counters.observe_recent_tracks(user.username, user.recent_tracks)
+        return result
+
+    async def _perform_rpc_cycle(self, user, is_forced_update):
+        """
+        Executes a single cycle of the RPC update process.
+        Returns the wait time for the next cycle.
+        """
+        # If forced update and we have cached data, reuse it without polling Last.fm
+        if is_forced_update and self.cached_track_data:
+            current_track, data = self.cached_track_data
+        else:
+            # Normal poll cycle
+            with get_metrics().timed("now_playing"):
+                current_track, data = await asyncio.to_thread(self._poll_now_playing, user)
+            self.scheduler.record_poll()
+            if data:
+                self.cached_track_data = (current_track, data)
+        
+        if data:
+            await self._handle_active_track(current_track, data, is_forced_update)
+            duration_ms = data[4] or 0
+            wait_time = self.scheduler.next_playing_interval(str(current_track), duration_ms / 1000)
+            # Near the end of the track, warm the caches for the likely next one
+            self.prefetcher.on_poll(user, current_track, self.scheduler.time_remaining(duration_ms / 1000))
+        else:
+            await self._handle_no_track()
+            self.cached_track_data = None
+            wait_time = self.scheduler.next_idle_interval()
+
+        logger.debug(f"Next poll in {wait_time:.1f}s ({self.scheduler.requests_per_hour:.0f} requests/hour)")
+        return wait_time
@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+import constants.project as project
+from utils.string_utils import messenger
+from utils.metrics import get_metrics
+from api.lastfm.user.tracking import User
+from core.scheduler import PollScheduler
+
+logger = logging.getLogger('poller')
+
+class _Account:
+    """Polling state of one followed user."""
+
+    def __init__(self, username):
+        self.username = username
+        self.user = User(username)
+        self.scheduler = PollScheduler()
+        self.track = None
+        self.info = None
+
+class MultiUserPoller:
+    """
+    Mirrors now-playing for many Last.fm users from one process.
+
+    All accounts run under a single scheduler: a heap of due times drained
+    by one coroutine, with at most ``concurrency`` polls in flight. Each
+    account keeps its own adaptive interval (see PollScheduler), and the
+    first polls are staggered over one check interval (or further apart if
+    the API rate limit requires) so the accounts don't poll in lockstep. The HTTP pool, the metadata and library caches and
+    the API rate limiter are process-wide, so every account shares them.
+    """
+
+    def __init__(self, usernames, on_change=None, concurrency=project.HTTP_POOL_MAXSIZE, clock=time.monotonic):
+        self.accounts = [_Account(username) for username in dict.fromkeys(usernames)]
+        self.on_change = on_change or self._log_change
+        self.clock = clock
+        self.polls = 0
+        self._concurrency = concurrency
+        self._queue = []
+        self._order = itertools.count()
+        self._wakeup = None
+
+    @staticmethod
+    def _log_change(username, track, info):
+        if track:
+            logger.info(f"{username}: {messenger('now_playing', str(track))}")
+        else:
+            logger.info(f"{username}: {messenger('no_track')}")
+
+    def _schedule(self, account, due):
+        heapq.heappush(self._queue, (due, next(self._order), account))
+        self._wakeup.set()
+
+    async def _poll(self, account, slots):
+        async with slots:
+            try:
+                with get_metrics().timed("now_playing"):
+                    track, info = await asyncio.to_thread(account.user.now_playing)
+            except Exception as e:
+                logger.error(f"Polling {account.username} failed: {e}", exc_info=True)
+                track, info = None, None
+        self.polls += 1
+        account.scheduler.record_poll()
+
+        if str(track) != str(account.track):
+            account.track, account.info = track, info
+            self.on_change(account.username, track, info)
+
+        if info:
+            wait = account.scheduler.next_playing_interval(str(track), (info[4] or 0) / 1000)
+        else:
+            wait = account.scheduler.next_idle_interval()
+        self._schedule(account, self.clock() + wait)
+
+    async def run(self, stop_event=None):
+        """Polls every account until ``stop_event`` is set (or forever)."""
+        self._wakeup = asyncio.Event()
+        stop_event = stop_event or asyncio.Event()
+        slots = asyncio.Semaphore(self._concurrency)
+        in_flight = set()
+
+        start = self.clock()
+        # Spread the first round over one check interval, but no faster than the API rate limit
+        stagger = max(project.TRACK_CHECK_INTERVAL / max(len(self.accounts), 1), 1 / project.LASTFM_API_RATE)
+        for i, account in enumerate(self.accounts):
+            self._schedule(account, start + i * stagger)
+        logger.info(f"Polling {len(self.accounts)} users, staggered {stagger:.2f}s apart")
+
+        try:
+            while not stop_event.is_set():
+                self._wakeup.clear()
+                delay = self._queue[0][0] - self.clock() if self._queue else None
+                if delay is None or delay > 0:
+                    # Sleep until the earliest poll is due, a poll reschedules, or we are stopped
+                    waiters = [asyncio.ensure_future(self._wakeup.wait()), asyncio.ensure_future(stop_event.wait())]
+                    _, pending = await asyncio.wait(waiters, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                    for waiter in pending:
+                        waiter.cancel()
+                    continue
+
+                _, _, account = heapq.heappop(self._queue)
+                task = asyncio.create_task(self._poll(account, slots))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+        finally:
+            for task in list(in_flight):
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.accounts),
+            "polls": self.polls,
+            "requests_per_hour": sum(account.scheduler.requests_per_hour for account in self.accounts),
+            "playing": sum(1 for account in self.accounts if account.track),
+        }
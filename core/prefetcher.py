@@ -0,0 +1,154 @@
+import logging
+import threading
+
+import constants.project as project
+from api.lastfm.metadata import get_metadata_cache, normalize
+from api.lastfm.user.library import get_artist_count, get_track_count
+from utils.cache import PersistentCache
+from utils.metrics import get_metrics
+from utils.request_utils import run_in_background
+
+logger = logging.getLogger('prefetch')
+
+def _track_key(artist, title) -> tuple:
+    return normalize(artist), normalize(title)
+
+class NextTrackPrefetcher:
+    """
+    Warms the caches for the track most likely to play next.
+
+    Candidates are the next title on the current album's cached tracklist
+    and whatever followed the current track the last time the user played
+    it. Those transitions are learned from the track changes the engine
+    sees and, once per user, from their recent scrobbles. Within
+    ``lead_time`` seconds of the current track's expected end, the
+    candidates' metadata and library counts are fetched in the background,
+    so the presence update for the next track is served from the caches.
+    """
+
+    def __init__(self, lead_time=None, max_candidates=None):
+        self.lead_time = lead_time if lead_time is not None else project.PREFETCH_LEAD_TIME
+        self.max_candidates = max_candidates if max_candidates is not None else project.PREFETCH_MAX_CANDIDATES
+        self.prefetches = 0
+        self.hits = 0
+        self._transitions = None
+        self._lock = threading.Lock()
+        self._previous = {}
+        self._seeded = set()
+        self._prefetched_for = None
+        self._predicted = set()
+
+    def transitions(self) -> PersistentCache:
+        """(username, artist, title) -> the track that followed it; opened on first use."""
+        if self._transitions is None:
+            with self._lock:
+                if self._transitions is None:
+                    self._transitions = PersistentCache(
+                        project.CACHE_DB_PATH, 'next', project.TRACK_CACHE_TTL, project.PREFETCH_MAX_TRANSITIONS
+                    )
+        return self._transitions
+
+    def on_poll(self, user, track, remaining):
+        """
+        Called from the poll loop whenever a track is playing.
+
+        Args:
+            user (User): The polled user.
+            track (RecentTrack): The playing track.
+            remaining (float): Seconds left of the track, None if its length is unknown.
+
+        Returns:
+            Future: The background prefetch if one was started, otherwise None.
+        """
+        key = _track_key(track.artist, track.title)
+        previous = self._previous.get(user.username)
+        if previous is None or _track_key(previous.artist, previous.title) != key:
+            self._on_track_change(user.username, previous, track)
+
+        if remaining is None or remaining > self.lead_time:
+            return None
+        with self._lock:
+            if self._prefetched_for == (user.username, key):
+                return None
+            self._prefetched_for = (user.username, key)
+        return run_in_background(lambda: self._prefetch(user, track))
+
+    def _on_track_change(self, username, previous, track):
+        self._previous[username] = track
+        key = _track_key(track.artist, track.title)
+        with self._lock:
+            was_predicted = key in self._predicted
+            self._predicted.clear()
+            self._prefetched_for = None
+        if was_predicted:
+            self.hits += 1
+            get_metrics().inc("prefetch_hits_total")
+            logger.debug(f"Prefetch hit: {track}")
+        if previous is not None:
+            run_in_background(lambda: self._learn(username, previous.artist, previous.title, track))
+
+    def _learn(self, username, artist, title, following):
+        """Remembers that following played right after (artist, title)."""
+        self.transitions().set((username.casefold(), *_track_key(artist, title)), {
+            "artist": following.artist, "title": following.title, "album": following.album
+        })
+
+    def _seed(self, user):
+        """Learns the transitions in the user's recent scrobbles, once per user."""
+        with self._lock:
+            if user.username in self._seeded:
+                return
+            self._seeded.add(user.username)
+
+        history = user.get_history(project.PREFETCH_HISTORY_SIZE)
+        # Newest first: walk it backwards so the latest transition of a track wins
+        for index in range(len(history) - 2, -1, -1):
+            earlier, later = history[index + 1], history[index]
+            if _track_key(earlier.artist, earlier.title) != _track_key(later.artist, later.title):
+                self._learn(user.username, earlier.artist, earlier.title, later)
+        logger.debug(f"Learned listening patterns from {len(history)} recent tracks of {user.username}")
+
+    def candidates(self, user, track) -> list:
+        """
+        Predicts the next track, most likely first.
+
+        Returns:
+            list: Up to max_candidates ``{artist, title, album}`` dicts.
+        """
+        found = []
+        next_title = get_metadata_cache().next_on_album(track.artist, track.album, track.title)
+        if next_title:
+            found.append({"artist": track.artist, "title": next_title, "album": track.album})
+        learned = self.transitions().get((user.username.casefold(), *_track_key(track.artist, track.title)))
+        if learned:
+            found.append(learned[0])
+
+        keys = {_track_key(track.artist, track.title)}
+        unique = []
+        for candidate in found:
+            key = _track_key(candidate["artist"], candidate["title"])
+            if key not in keys:
+                keys.add(key)
+                unique.append(candidate)
+        return unique[:self.max_candidates]
+
+    def _prefetch(self, user, track):
+        self._seed(user)
+        for candidate in self.candidates(user, track):
+            artist, title = candidate["artist"], candidate["title"]
+            try:
+                with get_metrics().timed("prefetch"):
+                    user.prefetch_metadata(artist, title, candidate.get("album"))
+                    get_artist_count(user.username, artist)
+                    get_track_count(user.username, artist, title)
+            except Exception as e:
+                logger.debug(f"Prefetch of {artist} - {title} failed: {e}")
+                continue
+            with self._lock:
+                if self._prefetched_for != (user.username, _track_key(track.artist, track.title)):
+                    # The track changed meanwhile; this guess no longer counts
+                    return
+                self._predicted.add(_track_key(artist, title))
+            self.prefetches += 1
+            get_metrics().inc("prefetch_total")
+            logger.debug(f"Prefetched {artist} - {title} after {track}")
@@ -0,0 +1,108 @@
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+import constants.project as project
+
+logger = logging.getLogger('scheduler')
+
+class PollScheduler:
+    """
+    Decides how long to wait before the next Last.fm poll.
+
+    While a track with a known duration plays, polls are sparse in the middle
+    of the track and dense around its expected end, where the next track
+    change is most likely. When nothing plays, the interval backs off step by
+    step and snaps back to fast polling as soon as playback resumes.
+    A track still reported POLL_OVERDUE_GRACE seconds after its expected end
+    starts a new cycle, as if it had been played again.
+    Every real poll is recorded so the request rate can be reported.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.track_key = None
+        self.track_started_at = None
+        self.idle_since = None
+        self.total_polls = 0
+        self._recent_polls = deque()
+        self._last_report = clock()
+
+    def reset(self):
+        """Forgets the current track and idle state (e.g. after a user change)."""
+        self.track_key = None
+        self.track_started_at = None
+        self.idle_since = None
+
+    def record_poll(self):
+        """Counts one Last.fm now-playing request."""
+        now = self.clock()
+        self.total_polls += 1
+        self._recent_polls.append(now)
+        while self._recent_polls and now - self._recent_polls[0] > 3600:
+            self._recent_polls.popleft()
+
+        if now - self._last_report >= project.POLL_RATE_LOG_INTERVAL:
+            self._last_report = now
+            logger.info(f"Polling rate: {self.requests_per_hour:.0f} requests/hour ({self.total_polls} total)")
+
+    @property
+    def requests_per_hour(self) -> float:
+        """Polls made over the last hour, extrapolated if running for less than that."""
+        if not self._recent_polls:
+            return 0.0
+        window = max(self.clock() - self._recent_polls[0], project.TRACK_CHECK_INTERVAL)
+        return len(self._recent_polls) * 3600 / min(window, 3600)
+
+    def next_playing_interval(self, track_key, duration) -> float:
+        """
+        Returns the wait while a track is playing.
+
+        Args:
+            track_key (str): Identifies the current track.
+            duration (float): Track length in seconds, 0 if unknown.
+        """
+        now = self.clock()
+        self.idle_since = None
+        if track_key != self.track_key:
+            self.track_key = track_key
+            self.track_started_at = now
+
+        remaining = self.time_remaining(duration)
+        if remaining is None:
+            return project.TRACK_CHECK_INTERVAL
+
+        if remaining < -project.POLL_OVERDUE_GRACE:
+            # Still reported well past its end (paused, on repeat, or a stale
+            # now-playing entry): treat it as a new play instead of polling
+            # densely forever
+            logger.debug(f"{track_key} ran {-remaining:.0f}s past its length, restarting its poll cycle")
+            self.track_started_at = now
+            remaining = duration
+
+        if remaining <= project.POLL_NEAR_END_WINDOW:
+            # Around (or past) the expected end: the next track can appear any moment
+            return project.POLL_NEAR_END_INTERVAL
+
+        # Halve the distance to the near-end window each time, within bounds
+        interval = (remaining - project.POLL_NEAR_END_WINDOW) / 2
+        return max(project.TRACK_CHECK_INTERVAL, min(interval, project.POLL_MAX_INTERVAL))
+
+    def time_remaining(self, duration) -> Optional[float]:
+        """Seconds left of the current track (negative once overdue), None if unknown."""
+        if not duration or self.track_started_at is None:
+            return None
+        return duration - (self.clock() - self.track_started_at)
+
+    def next_idle_interval(self) -> float:
+        """Returns the wait while nothing is playing, doubling every backoff step."""
+        now = self.clock()
+        self.track_key = None
+        self.track_started_at = None
+        if self.idle_since is None:
+            self.idle_since = now
+
+        steps = int((now - self.idle_since) // project.IDLE_BACKOFF_STEP)
+        interval = project.UPDATE_INTERVAL * (2 ** min(steps, 16))
+        return min(interval, project.IDLE_MAX_INTERVAL)
@@ -1,17 +1,20 @@
 import logging
-from utils.logging_config import setup_logging
-from constants.project import USERNAME, API_KEY, API_SECRET, APP_LANG
+import sys
 
-# Configure enhanced logging
-setup_logging(level=logging.INFO)
+import constants.project as project
+
+def init_logging():
+    """Configures the enhanced logging; done in the entry points, not at import."""
+    from utils.logging_config import setup_logging
+    setup_logging(level=logging.INFO)
 
 def check_config():
     """Checks if the configuration is complete. If not, opens the GUI."""
-    if not all([USERNAME, API_KEY, API_SECRET]) or (USERNAME and "<" in str(USERNAME)):
+    username, api_key, api_secret = project.USERNAME, project.API_KEY, project.API_SECRET
+    if not all([username, api_key, api_secret]) or (username and "<" in str(username)):
         logging.warning("Configuration incomplete or placeholder detected. Opening settings...")
         from utils.gui import ConfigGUI
         import yaml
-        import sys
 
         def save_and_exit(new_config):
             try:
@@ -24,12 +27,17 @@ def check_config():
                 logging.error(f"Failed to save configuration: {e}")
                 return False
 
-        gui = ConfigGUI((USERNAME, API_KEY, API_SECRET, APP_LANG), save_and_exit)
+        gui = ConfigGUI((username, api_key, api_secret, project.APP_LANG), save_and_exit)
         gui.run()
         return False
     return True
 
 def main():
+    if "--profile-startup" in sys.argv:
+        from utils.startup_profiler import profile_startup
+        sys.exit(profile_startup("tray"))
+
+    init_logging()
     if check_config():
         from core.application import App
         try:
@@ -38,5 +46,39 @@ def main():
         except Exception as e:
             logging.critical(f"Application failed to start: {e}", exc_info=True)
 
+def main_headless():
+    """Runs the Last.fm to Discord presence without the tray icon or any GUI toolkit; status goes to the log."""
+    if "--profile-startup" in sys.argv:
+        from utils.startup_profiler import profile_startup
+        sys.exit(profile_startup("headless"))
+
+    init_logging()
+    username, api_key = project.USERNAME, project.API_KEY
+    if not all([username, api_key]) or "<" in str(username) or "<" in str(api_key):
+        logging.error("Configuration incomplete. Set USER.USERNAME and API.KEY in config.yaml.")
+        return
+    from core.engine import PresenceEngine
+    try:
+        PresenceEngine().run()
+    except Exception as e:
+        logging.critical(f"Application failed to start: {e}", exc_info=True)
+
+def main_multi():
+    """Mirrors now-playing for several users in one process: lastfm-rpc-multi user1 user2 ..."""
+    import asyncio
+    from core.multi_poller import MultiUserPoller
+
+    init_logging()
+    if not project.API_KEY or "<" in str(project.API_KEY):
+        logging.error("An API key is required in config.yaml to poll Last.fm.")
+        return
+    usernames = sys.argv[1:] or [project.USERNAME]
+    from utils.metrics import serve_metrics_from_env
+    serve_metrics_from_env()
+    try:
+        asyncio.run(MultiUserPoller(usernames).run())
+    except KeyboardInterrupt:
+        logging.info("Stopped polling.")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,42 @@
+from api.lastfm.user.counters import ScrobbleCounters
+from api.lastfm.user.tracking import RecentTrack
+
+USERNAME = "listener"
+
+def _counters():
+    counters = ScrobbleCounters()
+    counters.recorded = []
+    counters.record_scrobble = lambda username, artist, title: counters.recorded.append((username, artist, title))
+    return counters
+
+def _scrobble(title, at):
+    return RecentTrack("Artist", title, scrobbled_at=at)
+
+def test_first_poll_only_sets_the_starting_point():
+    counters = _counters()
+    assert counters.observe_recent_tracks(USERNAME, [_scrobble("Old", 1000), _scrobble("Older", 900)]) == 0
+    assert counters.recorded == []
+
+def test_pause_and_stop_count_nothing():
+    counters = _counters()
+    playing = [RecentTrack("Artist", "Paused", now_playing=True), _scrobble("Old", 1000)]
+    counters.observe_recent_tracks(USERNAME, playing)
+
+    # Paused for half an hour, then stopped: the polls keep returning the same scrobble
+    assert counters.observe_recent_tracks(USERNAME, playing) == 0
+    assert counters.observe_recent_tracks(USERNAME, [_scrobble("Old", 1000)]) == 0
+    assert counters.recorded == []
+
+def test_new_scrobbles_count_once_in_order():
+    counters = _counters()
+    counters.observe_recent_tracks(USERNAME, [_scrobble("Old", 1000)])
+
+    assert counters.observe_recent_tracks(USERNAME, [_scrobble("Second", 1400), _scrobble("First", 1200)]) == 2
+    assert counters.observe_recent_tracks(USERNAME, [_scrobble("Second", 1400), _scrobble("First", 1200)]) == 0
+    assert counters.recorded == [(USERNAME, "Artist", "First"), (USERNAME, "Artist", "Second")]
+
+def test_users_are_tracked_separately():
+    counters = _counters()
+    counters.observe_recent_tracks(USERNAME, [_scrobble("Old", 1000)])
+    assert counters.observe_recent_tracks("other", [_scrobble("Theirs", 2000)]) == 0
+    assert counters.recorded == []
@@ -0,0 +1,62 @@
+import pytest
+
+import api.lastfm.user.profile as profile
+
+USERNAME = "listener"
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A ProfileCache in a temporary directory, on a fake clock and fake fetches."""
+    monkeypatch.chdir(tmp_path)
+    clock = Clock()
+    monkeypatch.setattr(profile.time, "time", clock)
+    calls = []
+
+    def page(username):
+        calls.append("page")
+        return {"display_name": "Listener", "avatar_url": None, "header_status": [100, 10, 1]}
+
+    def counters(username):
+        calls.append("counters")
+        return [150, 12, 2]
+
+    monkeypatch.setattr(profile, "get_user_data", page)
+    monkeypatch.setattr(profile, "get_user_counters", counters)
+    cache = profile.ProfileCache(identity_ttl=6 * 3600, counters_ttl=1800)
+    cache.clock, cache.calls = clock, calls
+    return cache
+
+def test_first_refresh_scrapes_the_page(cache):
+    assert cache.refresh(USERNAME)["header_status"] == [100, 10, 1]
+    assert cache.calls == ["page"]
+
+def test_expired_counters_refresh_without_the_page(cache):
+    cache.refresh(USERNAME)
+    cache.clock.now += 1800
+    assert cache.is_stale(USERNAME)
+
+    data = cache.refresh(USERNAME)
+    assert cache.calls == ["page", "counters"]
+    assert data == {"display_name": "Listener", "avatar_url": None, "header_status": [150, 12, 2]}
+    assert not cache.is_stale(USERNAME)
+
+def test_expired_identity_scrapes_the_page_again(cache):
+    cache.refresh(USERNAME)
+    cache.clock.now += 6 * 3600
+    cache.refresh(USERNAME)
+    assert cache.calls == ["page", "page"]
+
+def test_local_bumps_are_replaced_by_the_reconciled_counters(cache):
+    cache.refresh(USERNAME)
+    cache.bump_counters(USERNAME, scrobbles=2, artists=1)
+    assert cache.get(USERNAME)["header_status"] == [102, 11, 1]
+
+    cache.refresh_counters(USERNAME)
+    assert cache.get(USERNAME)["header_status"] == [150, 12, 2]
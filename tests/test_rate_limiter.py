@@ -0,0 +1,49 @@
+from utils.rate_limiter import RateLimiter
+
+class Clock:
+    """A monotonic clock whose sleep just moves it forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def _limiter(clock, rate=5, capacity=2):
+    return RateLimiter(rate, capacity, clock=clock, sleep=clock.sleep)
+
+def test_burst_up_to_capacity_does_not_wait():
+    clock = Clock()
+    limiter = _limiter(clock)
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == []
+
+def test_requests_past_the_burst_wait_for_the_refill():
+    clock = Clock()
+    limiter = _limiter(clock)
+    for _ in range(4):
+        limiter.acquire()
+    assert clock.sleeps == [0.2, 0.2]
+    assert limiter.waited == 0.4
+
+def test_tokens_refill_with_time_up_to_capacity():
+    clock = Clock()
+    limiter = _limiter(clock)
+    limiter.acquire()
+    limiter.acquire()
+
+    clock.now += 0.2
+    limiter.acquire()
+    assert clock.sleeps == []
+
+    # A long pause refills no more than the bucket holds
+    clock.now += 60
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == [0.2]
@@ -0,0 +1,94 @@
+import constants.project as project
+from core.scheduler import PollScheduler
+
+TRACK = "Artist - Title"
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_unknown_duration_polls_at_the_track_check_interval():
+    scheduler = PollScheduler(Clock())
+    assert scheduler.next_playing_interval(TRACK, 0) == project.TRACK_CHECK_INTERVAL
+    assert scheduler.time_remaining(0) is None
+
+def test_intervals_shrink_towards_the_end_of_the_track():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    waits = []
+    while clock.now < 240:
+        wait = scheduler.next_playing_interval(TRACK, 240)
+        waits.append((scheduler.time_remaining(240), wait))
+        clock.now += wait
+
+    # Sparse in the middle, never past the near-end window, then dense
+    assert waits[0][1] == project.POLL_MAX_INTERVAL
+    for remaining, wait in waits:
+        if remaining > project.POLL_NEAR_END_WINDOW:
+            assert remaining - wait >= project.POLL_NEAR_END_WINDOW / 2
+        else:
+            assert wait == project.POLL_NEAR_END_INTERVAL
+    assert [wait for _, wait in waits] == sorted((wait for _, wait in waits), reverse=True)
+
+def test_overdue_track_restarts_its_poll_cycle():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    scheduler.next_playing_interval(TRACK, 60)
+
+    clock.now = 60 + project.POLL_OVERDUE_GRACE - 1
+    assert scheduler.next_playing_interval(TRACK, 60) == project.POLL_NEAR_END_INTERVAL
+
+    clock.now = 60 + project.POLL_OVERDUE_GRACE + 1
+    assert scheduler.next_playing_interval(TRACK, 60) > project.POLL_NEAR_END_INTERVAL
+    assert scheduler.time_remaining(60) == 60
+
+def test_new_track_starts_a_new_cycle():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    scheduler.next_playing_interval(TRACK, 200)
+    clock.now = 190
+    assert scheduler.next_playing_interval(TRACK, 200) == project.POLL_NEAR_END_INTERVAL
+    assert scheduler.next_playing_interval("Artist - Next", 200) == project.POLL_MAX_INTERVAL
+
+def test_idle_backoff_doubles_per_step_up_to_the_maximum():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    waits = []
+    for step in range(8):
+        clock.now = step * project.IDLE_BACKOFF_STEP
+        waits.append(scheduler.next_idle_interval())
+
+    assert waits[0] == project.UPDATE_INTERVAL
+    assert waits[1] == project.UPDATE_INTERVAL * 2
+    assert waits[-1] == project.IDLE_MAX_INTERVAL
+    assert waits == sorted(waits)
+
+def test_playback_resets_the_idle_backoff():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    scheduler.next_idle_interval()
+    clock.now = 10 * project.IDLE_BACKOFF_STEP
+    assert scheduler.next_idle_interval() == project.IDLE_MAX_INTERVAL
+
+    scheduler.next_playing_interval(TRACK, 0)
+    assert scheduler.next_idle_interval() == project.UPDATE_INTERVAL
+
+def test_requests_per_hour_counts_the_last_hour():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    for _ in range(120):
+        clock.now += 60
+        scheduler.record_poll()
+    # A poll exactly an hour old still counts
+    assert scheduler.requests_per_hour == 61
+
+def test_requests_per_hour_extrapolates_a_short_run():
+    clock = Clock()
+    scheduler = PollScheduler(clock)
+    for _ in range(10):
+        scheduler.record_poll()
+        clock.now += 30
+    assert scheduler.requests_per_hour == 10 * 3600 / 300
@@ -0,0 +1,85 @@
+from api.discord.send_queue import ActivitySendQueue
+
+class FakeClock:
+    """A monotonic clock and flush timers that only move when the test says so."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def __call__(self):
+        return self.now
+
+    def call_later(self, wait, callback):
+        timer = FakeTimer(self.now + wait, callback)
+        self.timers.append(timer)
+        return timer
+
+    def advance(self, seconds):
+        self.now += seconds
+        for timer in list(self.timers):
+            if not timer.cancelled and timer.due <= self.now:
+                self.timers.remove(timer)
+                timer.callback()
+
+class FakeTimer:
+    def __init__(self, due, callback):
+        self.due, self.callback = due, callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+def _queue(clock, sent):
+    return ActivitySendQueue(lambda payload: sent.append((clock.now, payload)) or True,
+                             min_interval=15, clock=clock, timer=clock.call_later)
+
+def test_first_update_goes_out_at_once():
+    clock, sent = FakeClock(), []
+    _queue(clock, sent).submit("a")
+    assert sent == [(0.0, "a")]
+
+def test_updates_inside_the_window_coalesce_into_the_newest():
+    clock, sent = FakeClock(), []
+    queue = _queue(clock, sent)
+    queue.submit("a")
+    clock.advance(2)
+    queue.submit("b")
+    clock.advance(3)
+    queue.submit("c")
+    assert queue.staleness == 3
+
+    clock.advance(9)
+    assert sent == [(0.0, "a")]
+    clock.advance(1)
+    assert sent == [(0.0, "a"), (15.0, "c")]
+    assert queue.staleness == 0
+
+def test_next_window_starts_at_the_last_send():
+    clock, sent = FakeClock(), []
+    queue = _queue(clock, sent)
+    queue.submit("a")
+    clock.advance(20)
+    queue.submit("b")
+    clock.advance(5)
+    queue.submit("c")
+    clock.advance(10)
+    assert [payload for _, payload in sent] == ["a", "b", "c"]
+    assert sent[-1][0] == 35.0
+
+def test_skipped_send_leaves_the_window_open():
+    clock, sent = FakeClock(), []
+    queue = ActivitySendQueue(lambda payload: False, min_interval=15, clock=clock, timer=clock.call_later)
+    queue.submit("a")
+    clock.advance(1)
+    queue.submit("b")
+    assert clock.timers == []
+
+def test_clear_drops_the_pending_update():
+    clock, sent = FakeClock(), []
+    queue = _queue(clock, sent)
+    queue.submit("a")
+    queue.submit("b")
+    queue.clear()
+    clock.advance(15)
+    assert sent == [(0.0, "a")]
@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from utils.metrics import get_metrics
+
+logger = logging.getLogger('cache')
+
+class PersistentCache:
+    """
+    A small SQLite-backed key/value cache with TTL staleness and LRU eviction.
+
+    Several caches can share one database file; each uses its own namespace.
+    Entries are never dropped for being stale, only marked so callers can serve
+    them immediately and refresh in the background. Eviction removes the least
+    recently read entries once ``max_entries`` is exceeded.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl: float, max_entries: int):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = self._open()
+        get_metrics().track_cache(self)
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        """Opens (and creates if needed) the cache database."""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries (namespace, accessed_at)")
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            # The app keeps working without persistence, every lookup is a miss
+            logger.error(f"Failed to open cache database {self.path}: {e}")
+            return None
+
+    @staticmethod
+    def _encode_key(key: Tuple) -> str:
+        return json.dumps(key, ensure_ascii=False)
+
+    def get(self, key: Tuple) -> Optional[Tuple[Any, bool]]:
+        """
+        Looks up a key.
+
+        Returns:
+            tuple: (value, is_stale), or None on a miss.
+        """
+        if self._conn is None:
+            self.misses += 1
+            return None
+
+        now = time.time()
+        encoded = self._encode_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, fetched_at FROM entries WHERE namespace = ? AND key = ?",
+                (self.namespace, encoded)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, encoded)
+            )
+            self._conn.commit()
+
+        self.hits += 1
+        value, fetched_at = row
+        return json.loads(value), (now - fetched_at) > self.ttl
+
+    def set(self, key: Tuple, value: Any, fetched_at: Optional[float] = None):
+        """Stores a value and evicts the least recently used entries if over capacity."""
+        if self._conn is None:
+            return
+
+        now = time.time()
+        fetched_at = now if fetched_at is None else fetched_at
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, self._encode_key(key), json.dumps(value, ensure_ascii=False), fetched_at, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def increment(self, key: Tuple, amount: int = 1) -> Optional[int]:
+        """
+        Adds to a cached integer in place, keeping its fetched_at so TTL refreshes still happen.
+
+        Returns:
+            int: The new value, or None if the key is not cached.
+        """
+        if self._conn is None:
+            return None
+
+        encoded = self._encode_key(key)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ?",
+                (self.namespace, encoded)
+            ).fetchone()
+            if row is None:
+                return None
+            value = json.loads(row[0]) + amount
+            self._conn.execute(
+                "UPDATE entries SET value = ? WHERE namespace = ? AND key = ?",
+                (json.dumps(value), self.namespace, encoded)
+            )
+            self._conn.commit()
+        return value
+
+    def _evict(self):
+        """Drops the least recently read entries beyond max_entries. Caller holds the lock."""
+        (count,) = self._conn.execute(
+            "SELECT COUNT(*) FROM entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                " SELECT key FROM entries WHERE namespace = ? ORDER BY accessed_at ASC LIMIT ?)",
+                (self.namespace, self.namespace, overflow)
+            )
+            logger.debug(f"Evicted {overflow} entries from '{self.namespace}' cache")
+
+    def clear(self):
+        """Removes every entry in this namespace."""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,58 @@
+from bs4.filter import ElementFilter
+
+def _detect_parser() -> str:
+    """Prefers the lxml tree builder when it is installed, falling back to html.parser."""
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+HTML_PARSER = _detect_parser()
+
+class TargetFilter(ElementFilter):
+    """
+    A parse-time filter that only builds the elements the scrapers read.
+
+    Each target is a (tag name, attribute, value) triple; class attributes
+    match if the value is one of the element's classes. Matching elements are
+    kept together with everything inside them, every other tag and string on
+    the page is discarded before a node is ever created.
+    """
+
+    def __init__(self, *targets):
+        super().__init__()
+        self.targets = targets
+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        if not attrs:
+            return False
+        for tag_name, attr, value in self.targets:
+            if name != tag_name:
+                continue
+            raw = attrs.get(attr)
+            if raw is None:
+                continue
+            if attr == 'class':
+                classes = raw.split() if isinstance(raw, str) else raw
+                if value in classes:
+                    return True
+            elif raw == value:
+                return True
+        return False
+
+    def allow_string_creation(self, string) -> bool:
+        # Only strings inside a kept element are wanted; those bypass this check
+        return False
+
+# Library pages: the artist/track scrobble count
+LIBRARY_COUNT_FILTER = TargetFilter(
+    ("p", "class", "metadata-display"),
+)
+
+# Profile pages: display name, header counters and the avatar meta tag
+PROFILE_HEADER_FILTER = TargetFilter(
+    ("span", "class", "header-title-display-name"),
+    ("div", "class", "header-metadata-display"),
+    ("meta", "property", "og:image"),
+)
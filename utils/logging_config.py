@@ -128,9 +128,6 @@ def setup_logging(level=logging.INFO):
         print(f"Failed to initialize file logging: {e}")
     
     # Silence noisy external libraries
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("pylast").setLevel(logging.WARNING)
     logging.getLogger("pypresence").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
     logging.getLogger("pystray").setLevel(logging.WARNING)
@@ -0,0 +1,282 @@
+import bisect
+import logging
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from constants.project import METRICS_LATENCY_BUCKETS, METRICS_QUEUE_BUCKETS, METRICS_PORT_ENV, METRICS_HOST
+
+logger = logging.getLogger('metrics')
+
+PREFIX = "lastfm_rpc_"
+
+# Metric name (without prefix) -> (type, help) for the exposition format
+METRICS = {
+    "stage_duration_seconds": ("histogram", "Time spent in each hot-path stage."),
+    "stage_errors_total": ("counter", "Hot-path stage runs that raised."),
+    "http_retries_total": ("counter", "HTTP requests retried after a transient failure."),
+    "http_circuit_rejections_total": ("counter", "HTTP requests refused because the host's circuit was open."),
+    "http_not_modified_total": ("counter", "Page fetches answered with 304 Not Modified."),
+    "discord_connects_total": ("counter", "Successful connections to the Discord client."),
+    "discord_updates_total": ("counter", "Activity payloads handed to Discord, by result."),
+    "discord_updates_replaced_total": ("counter", "Queued activity payloads replaced by a newer one before sending."),
+    "discord_send_latency_seconds": ("histogram", "Time from an activity change to its payload being sent."),
+    "discord_update_staleness_seconds": ("gauge", "How long the oldest unsent activity change has been waiting."),
+    "cache_hits_total": ("counter", "Persistent cache lookups that found an entry."),
+    "cache_misses_total": ("counter", "Persistent cache lookups that found nothing."),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class Histogram:
+    """Cumulative-bucket latency histogram with a running sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (the largest bucket for overflow)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """
+    Process-wide counters and latency histograms for the hot paths.
+
+    Updates take one lock and a dict lookup, cheap enough for every poll.
+    Cache hit and miss counts and the activity send queue's staleness are
+    read from the registered objects when the metrics are rendered, so
+    lookups pay nothing extra.
+    """
+
+    def __init__(self, buckets=METRICS_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._counters: Dict[Tuple[str, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self._caches = weakref.WeakSet()
+        self._send_queues = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels) -> Tuple[str, LabelKey]:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Adds to a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets=None, **labels):
+        """Records one observation in a histogram (buckets only apply when it is created)."""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets or self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Times the block as one run of a hot-path stage; a raising block also counts as an error."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+
+    def track_cache(self, cache):
+        """Reports a cache's hits and misses, labelled by its namespace."""
+        self._caches.add(cache)
+
+    def track_send_queue(self, queue):
+        """Reports an ActivitySendQueue's staleness (the largest over all queues)."""
+        self._send_queues.add(queue)
+
+    def _snapshot(self):
+        """Copies every series so rendering doesn't hold the lock."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {
+                key: (histogram.buckets, list(histogram.counts), histogram.sum, histogram.count)
+                for key, histogram in self._histograms.items()
+            }
+        for cache in list(self._caches):
+            labels = (("cache", cache.namespace),)
+            counters[("cache_hits_total", labels)] = counters.get(("cache_hits_total", labels), 0) + cache.hits
+            counters[("cache_misses_total", labels)] = counters.get(("cache_misses_total", labels), 0) + cache.misses
+        queues = list(self._send_queues)
+        if queues:
+            counters[("discord_update_staleness_seconds", ())] = max(queue.staleness for queue in queues)
+        return counters, histograms
+
+    def render_prometheus(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The scrape body, one sample per line.
+        """
+        counters, histograms = self._snapshot()
+        series = {}
+        for (name, labels), value in counters.items():
+            series.setdefault(name, []).append((labels, value))
+        for (name, labels), value in histograms.items():
+            series.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = METRICS.get(name, ("untyped", ""))
+            full_name = PREFIX + name
+            if help_text:
+                lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in sorted(series[name]):
+                if kind != "histogram":
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                buckets, counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self) -> List[str]:
+        """
+        Summarizes the metrics in a few short lines for the tray debug menu.
+
+        Returns:
+            list: One line per timed stage, then cache hit rates, the Discord
+                send queue and failure counts.
+        """
+        counters, histograms = self._snapshot()
+        lines = []
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            if name != "stage_duration_seconds" or not count:
+                continue
+            histogram = Histogram(buckets)
+            histogram.counts, histogram.count = counts, count
+            stage = dict(labels).get("stage")
+            lines.append(
+                f"{stage}: {count}x, avg {total / count * 1000:.0f} ms, "
+                f"p95 ≤ {histogram.quantile(0.95) * 1000:.0f} ms"
+            )
+
+        rates = []
+        for (name, labels), hits in sorted(counters.items()):
+            if name != "cache_hits_total":
+                continue
+            lookups = hits + counters.get(("cache_misses_total", labels), 0)
+            if lookups:
+                rates.append(f"{dict(labels)['cache']} {hits / lookups:.0%}")
+        if rates:
+            lines.append("Cache hits: " + ", ".join(rates))
+
+        queue = histograms.get(("discord_send_latency_seconds", ()))
+        if queue and queue[3]:
+            buckets, counts, total, count = queue
+            histogram = Histogram(buckets)
+            histogram.counts, histogram.count = counts, count
+            replaced = int(counters.get(("discord_updates_replaced_total", ()), 0))
+            staleness = counters.get(("discord_update_staleness_seconds", ()), 0)
+            lines.append(
+                f"Discord queue: avg {total / count:.1f} s, p95 ≤ {histogram.quantile(0.95):g} s, "
+                f"{replaced} replaced, waiting {staleness:.0f} s"
+            )
+
+        def total(metric):
+            return int(sum(value for (name, _), value in counters.items() if name == metric))
+        lines.append(f"Retries: {total('http_retries_total')}, reconnects: {max(total('discord_connects_total') - 1, 0)}")
+        return lines
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics() -> MetricsRegistry:
+    """Returns the process-wide metrics registry, creating it on first use."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def start_metrics_server(port: int, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """
+    Serves the metrics at http://host:port/metrics from a daemon thread.
+
+    Args:
+        port (int): The TCP port; 0 picks a free one.
+        host (str): The address to bind, loopback by default.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def serve_metrics_from_env() -> Optional[ThreadingHTTPServer]:
+    """Starts the scrape endpoint if METRICS_PORT_ENV names a port; failures are logged, not raised."""
+    port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    try:
+        return start_metrics_server(int(port))
+    except (ValueError, OSError) as e:
+        logger.warning(f"Metrics endpoint not started ({METRICS_PORT_ENV}={port!r}): {e}")
+        return None
@@ -0,0 +1,41 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger('ratelimit')
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread that talks to one service.
+
+    Allows bursts of up to ``capacity`` requests and ``rate`` requests per
+    second on average. ``acquire`` blocks the calling thread until a token
+    is available.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = capacity
+        self.waited = 0.0
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token, possibly in advance; returns how long to wait for it."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self):
+        """Blocks until the next request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            self.waited += wait
+            logger.debug(f"Rate limited, waiting {wait:.2f}s")
+            self.sleep(wait)
@@ -1,48 +1,245 @@
+import copy
 import logging
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 
-from constants.project import RETRY_INTERVAL, MAX_RETRIES
+from utils.retry_utils import RetryPolicy, CircuitOpenError, get_circuit_breaker
+from utils.metrics import get_metrics
+from utils.session_recorder import get_recorder
+from constants.project import (
+    REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT,
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, VALIDATOR_CACHE_SIZE
+)
 
-def get_response(url: str, retry_interval: int = RETRY_INTERVAL, max_retries: int = MAX_RETRIES) -> requests.Response:
+if TYPE_CHECKING:
+    # bs4 is imported on the first page parse, it isn't needed for API calls
+    from bs4 import BeautifulSoup
+    from bs4.filter import ElementFilter
+
+DEFAULT_TIMEOUT = (REQUEST_CONNECT_TIMEOUT, REQUEST_READ_TIMEOUT)
+
+_session = None
+_session_lock = threading.Lock()
+_fetch_pool = None
+
+# URL -> (ETag, Last-Modified, parsed result) for conditional requests
+_validators = OrderedDict()
+_validators_lock = threading.Lock()
+
+def _build_session() -> requests.Session:
+    """
+    Creates a session with pooled keep-alive connections and compression negotiation.
+
+    Returns:
+        requests.Session: The configured session.
     """
-    Connects to the specified URL and retries until a successful response is received or the max retries limit is reached.
-    
+    session = requests.Session()
+    # One pool per host, several sockets per pool so concurrent fetches don't queue
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": "gzip, deflate",
+        "Connection": "keep-alive",
+    })
+    return session
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared HTTP session, creating it on first use.
+
+    The underlying urllib3 pools are thread-safe, so the same session is used
+    from the RPC thread and any helper threads.
+
+    Returns:
+        requests.Session: The process-wide session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+def close_session():
+    """Closes the shared session and drops its pooled connections."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    """Returns the shared worker pool used for concurrent page fetches."""
+    global _fetch_pool
+    if _fetch_pool is None:
+        with _session_lock:
+            if _fetch_pool is None:
+                _fetch_pool = ThreadPoolExecutor(max_workers=HTTP_POOL_MAXSIZE, thread_name_prefix='fetch')
+    return _fetch_pool
+
+def fetch_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Runs independent fetch callables at the same time and collects their results.
+
+    A task that raises does not affect the others; its result is None.
+
+    Args:
+        tasks (dict): Result key mapped to a zero-argument callable.
+
+    Returns:
+        dict: Result key mapped to the callable's return value, or None on failure.
+    """
+    pool = _get_fetch_pool()
+    futures = {key: pool.submit(task) for key, task in tasks.items()}
+
+    results = {}
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            logging.warning(f"Concurrent fetch '{key}' failed: {e}")
+            results[key] = None
+    return results
+
+def run_in_background(task: Callable[[], Any]):
+    """
+    Schedules a callable on the shared fetch pool without waiting for it.
+
+    Failures are logged, never raised to the caller.
+    """
+    def _run():
+        try:
+            task()
+        except Exception as e:
+            logging.warning(f"Background fetch failed: {e}")
+
+    return _get_fetch_pool().submit(_run)
+
+def get_response(url: str, policy: Optional[RetryPolicy] = None, timeout=DEFAULT_TIMEOUT, headers: Optional[dict] = None) -> requests.Response:
+    """
+    Connects to the specified URL, retrying transient failures with backoff.
+
+    Requests go through the host's circuit breaker: while the circuit is open
+    they fail immediately instead of waiting on a host that is known to be
+    down, so callers can fall back to cached data right away.
+
     Args:
         url (str): The URL to send the request to.
-        retry_interval (int): The time interval (in seconds) between retries. Default is 2 seconds.
-        max_retries (int): The maximum number of retries before giving up. Default is 10 retries.
-    
+        policy (RetryPolicy): Backoff policy; defaults to RetryPolicy().
+        timeout (tuple): The (connect, read) timeouts in seconds for each attempt.
+        headers (dict): Extra request headers, e.g. conditional request validators.
+
     Returns:
         requests.Response: The response object from the request.
-    
+
     Raises:
-        requests.RequestException: If the request fails after the specified number of retries.
+        CircuitOpenError: If the host's circuit is open.
+        requests.RequestException: If the request fails after the policy's attempts.
     """
-    retries = 0
-    while retries < max_retries:
+    policy = policy or RetryPolicy()
+    host = urlsplit(url).netloc
+    breaker = get_circuit_breaker(host)
+    session = get_session()
+
+    for attempt in range(policy.max_attempts):
+        if not breaker.allow():
+            get_metrics().inc("http_circuit_rejections_total", host=host)
+            raise CircuitOpenError(f"Circuit open for {breaker.host}, skipping request: {url}")
         try:
-            response = requests.get(url)
+            response = session.get(url, timeout=timeout, headers=headers)
+            recorder = get_recorder()
+            if recorder:
+                recorder.record_http(url, response)
             response.raise_for_status()
+            breaker.record_success()
             return response
         except requests.RequestException as e:
-            retries += 1
-            logging.warning(f"Request failed ({e}), retrying {retries}/{max_retries} in {retry_interval} seconds...")
-            time.sleep(retry_interval)
-    
-    logging.error(f"Failed to retrieve URL after {max_retries} retries: {url}")
-    raise requests.RequestException(f"Failed to retrieve URL after {max_retries} retries: {url}")
+            if not policy.is_retryable(e):
+                # The host answered, it just didn't like the request
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= policy.max_attempts:
+                break
+            delay = policy.delay(attempt)
+            get_metrics().inc("http_retries_total", host=host)
+            logging.warning(f"Request failed ({e}), retrying {attempt + 1}/{policy.max_attempts - 1} in {delay:.2f} seconds...")
+            time.sleep(delay)
+
+    logging.error(f"Failed to retrieve URL after {policy.max_attempts} attempts: {url}")
+    raise requests.RequestException(f"Failed to retrieve URL after {policy.max_attempts} attempts: {url}")
 
-def get_dom(response: requests.Response) -> BeautifulSoup:
+def get_dom(response: requests.Response, parse_only: Optional['ElementFilter'] = None) -> 'BeautifulSoup':
     """
     Parses the response content into a BeautifulSoup object.
-    
+
     Args:
         response (requests.Response): The response object.
-    
+        parse_only (ElementFilter): Optional filter limiting which elements are built,
+            e.g. one of the filters in utils.html_utils.
+
     Returns:
         BeautifulSoup: The parsed HTML content.
     """
-    return BeautifulSoup(response.content, 'html.parser')
\ No newline at end of file
+    from bs4 import BeautifulSoup
+    from utils.html_utils import HTML_PARSER
+    with get_metrics().timed("html_parse"):
+        return BeautifulSoup(response.content, HTML_PARSER, parse_only=parse_only)
+
+def get_parsed(url: str, parse: Callable[['BeautifulSoup'], Any], parse_only: Optional['ElementFilter'] = None) -> Any:
+    """
+    Fetches a page and parses it, using conditional requests to skip unchanged pages.
+
+    The ETag and Last-Modified validators of each URL are remembered together
+    with the parsed result. Later requests send If-None-Match/If-Modified-Since,
+    and a 304 Not Modified answer returns the remembered result without
+    downloading or parsing the page again.
+
+    Args:
+        url (str): The page URL.
+        parse (callable): Turns the parsed DOM into the value to return.
+        parse_only (ElementFilter): Optional filter passed to get_dom.
+
+    Returns:
+        Any: The value returned by ``parse``.
+    """
+    with _validators_lock:
+        entry = _validators.get(url)
+
+    headers = {}
+    if entry:
+        etag, last_modified, _ = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    response = get_response(url, headers=headers)
+    if response.status_code == 304 and entry:
+        logging.debug(f"Not modified, reusing parsed page: {url}")
+        get_metrics().inc("http_not_modified_total")
+        with _validators_lock:
+            _validators.move_to_end(url)
+        return copy.deepcopy(entry[2])
+
+    parsed = parse(get_dom(response, parse_only))
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    with _validators_lock:
+        if etag or last_modified:
+            _validators[url] = (etag, last_modified, copy.deepcopy(parsed))
+            _validators.move_to_end(url)
+            while len(_validators) > VALIDATOR_CACHE_SIZE:
+                _validators.popitem(last=False)
+        else:
+            _validators.pop(url, None)
+    return parsed
\ No newline at end of file
@@ -0,0 +1,108 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import constants.project as project
+from constants.project import RECORD_PATH_ENV
+
+logger = logging.getLogger('recorder')
+
+# Query parameters that must never end up in a recording
+SECRET_PARAMS = {"api_key", "api_sig", "sk"}
+# Response headers a replay needs to answer conditional requests
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+def strip_secrets(url: str) -> str:
+    """Removes credentials from a URL's query and sorts it, so equal requests compare equal."""
+    parts = urlsplit(url)
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in SECRET_PARAMS)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def to_json(value):
+    """JSON fallback for activity payloads (enums are stored by value)."""
+    return getattr(value, "value", str(value))
+
+class SessionRecorder:
+    """
+    Writes the app's Last.fm traffic and Discord activities to a JSON lines file.
+
+    Every HTTP exchange is stored with its time offset, status, validators,
+    body and round-trip time (credentials stripped), and every activity that
+    reached Discord with its payload. benchmarks/replay.py plays a recording
+    back against the current code. Files ending in ``.gz`` are compressed.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self.started_at = clock()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        if path.endswith(".gz"):
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self._file = open(path, "w", encoding="utf-8", buffering=1)
+        self._write({
+            "type": "session",
+            "version": project.VERSION,
+            "started_at": self.started_at,
+            "username": project.USERNAME,
+            "lang": project.APP_LANG,
+            "api_url": project.LASTFM_API_URL,
+        })
+        atexit.register(self.close)
+
+    def _write(self, entry: dict):
+        with self._lock:
+            if self._file is not None:
+                self._file.write(json.dumps(entry, ensure_ascii=False, default=to_json) + "\n")
+
+    def record_http(self, url: str, response):
+        """Stores one HTTP exchange (including error and 304 answers)."""
+        self._write({
+            "type": "http",
+            "t": self.clock() - self.started_at,
+            "url": strip_secrets(url),
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers},
+            "body": response.text if response.status_code != 304 else "",
+            "elapsed": response.elapsed.total_seconds(),
+        })
+
+    def record_activity(self, payload: dict):
+        """Stores an activity payload that was sent to Discord."""
+        self._write({"type": "activity", "t": self.clock() - self.started_at, "payload": payload})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+_recorder = None
+_recorder_checked = False
+_recorder_lock = threading.Lock()
+
+def get_recorder() -> Optional[SessionRecorder]:
+    """Returns the session recorder if RECORD_PATH_ENV names a file, otherwise None."""
+    global _recorder, _recorder_checked
+    if not _recorder_checked:
+        with _recorder_lock:
+            if not _recorder_checked:
+                path = os.environ.get(RECORD_PATH_ENV)
+                if path:
+                    try:
+                        _recorder = SessionRecorder(path)
+                        logger.info(f"Recording Last.fm traffic and Discord activities to {path}")
+                    except OSError as e:
+                        logger.error(f"Could not start recording to {path}: {e}")
+                _recorder_checked = True
+    return _recorder
@@ -0,0 +1,118 @@
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+TOP_MODULES = 15
+
+_phases = []
+
+@contextmanager
+def phase(name: str):
+    """Times one startup step for the profiler report."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+def parse_importtime(lines) -> List[Tuple[str, int, int]]:
+    """
+    Parses ``python -X importtime`` output.
+
+    Args:
+        lines (iterable): Lines written to stderr by the interpreter.
+
+    Returns:
+        list: (module, self microseconds, cumulative microseconds) per import.
+    """
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|")
+            imports.append((module.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return imports
+
+def _package_totals(imports) -> Dict[str, int]:
+    """Sums self import time per top-level package."""
+    totals = defaultdict(int)
+    for module, self_us, _ in imports:
+        totals[module.split(".")[0]] += self_us
+    return totals
+
+def run_probe(entry: str):
+    """
+    Goes through the app's startup up to the first Last.fm poll, timing each step.
+
+    Runs in the child interpreter started by profile_startup; the phase
+    timings are printed as JSON on the last stdout line.
+    """
+    import logging
+    import constants.project as project
+
+    with phase("setup logging"):
+        from utils.logging_config import setup_logging
+        setup_logging(level=logging.WARNING)
+    with phase("read config.yaml"):
+        username = project.USERNAME
+    with phase("load translations"):
+        project.TRANSLATIONS
+    with phase(f"construct engine ({entry})"):
+        if entry == "tray":
+            from core.application import App
+            App()
+        else:
+            from core.engine import PresenceEngine
+            PresenceEngine()
+    with phase("first Last.fm poll"):
+        from api.lastfm.user.tracking import User
+        User(username).now_playing()
+    print(json.dumps(_phases))
+
+def profile_startup(entry: str = "tray") -> int:
+    """
+    Profiles a cold start of the app and prints where the time goes.
+
+    Starts a fresh interpreter with ``-X importtime`` that runs the startup
+    of the given entry point ('tray' or 'headless') up to the first poll,
+    then reports the steps, the most expensive modules and the import cost
+    per package.
+
+    Returns:
+        int: The child's exit status.
+    """
+    start = time.perf_counter()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"from utils.startup_profiler import run_probe; run_probe({entry!r})"],
+        capture_output=True, text=True
+    )
+    total = time.perf_counter() - start
+    if child.returncode != 0:
+        print(child.stderr[-2000:], file=sys.stderr)
+        return child.returncode
+
+    phases = json.loads(child.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(child.stderr.splitlines())
+
+    print(f"Startup profile ({entry}): {total * 1000:.0f} ms from process start to first poll result")
+    print("\nSteps (including the imports they trigger):")
+    for name, seconds in phases:
+        print(f"  {seconds * 1000:8.1f} ms  {name}")
+
+    print("\nSlowest modules (self time, cumulative in brackets):")
+    for module, self_us, cumulative_us in sorted(imports, key=lambda item: -item[1])[:TOP_MODULES]:
+        print(f"  {self_us / 1000:8.1f} ms  ({cumulative_us / 1000:7.1f} ms)  {module}")
+
+    print("\nImport time per package:")
+    totals = sorted(_package_totals(imports).items(), key=lambda item: -item[1])
+    for package, self_us in totals[:TOP_MODULES]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+    print(f"\n{len(imports)} modules imported, {sum(self_us for _, self_us in totals) / 1000:.0f} ms in imports")
+    return 0
@@ -1,5 +1,6 @@
 import logging
 import constants.project as project
+from utils.translation_catalog import get_catalog
 
 logger = logging.getLogger('utils')
 
@@ -7,14 +8,19 @@ def messenger(key, *args):
     """
     Retrieves a translation and formats it with provided arguments.
     Supports both variadic arguments and a single list/tuple collection.
+    Templates are formatted with the catalog's bound str.format, which
+    also tells texts without fields apart without inspecting them.
     """
     try:
+        translations = project.TRANSLATIONS
         if not args:
-            return project.TRANSLATIONS[key]
+            return translations[key]
         
         # Unpack if passed as a single collection
         actual_args = args[0] if len(args) == 1 and isinstance(args[0], (list, tuple)) else args
-        return project.TRANSLATIONS[key].format(*(str(arg) for arg in actual_args))
+        formatter = get_catalog().formatters.get(key)
+        # A text without fields ignores its arguments, like str.format would
+        return formatter(*actual_args) if formatter else translations[key]
     except (KeyError, IndexError, ValueError, TypeError) as e:
         logger.error(f'Translation error for key "{key}": {e}')
         return f"[{key}]"
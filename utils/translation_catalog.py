@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from constants.project import TRANSLATIONS_DIR, TRANSLATIONS_CATALOG
+
+logger = logging.getLogger('utils')
+
+CATALOG_FORMAT = 1
+
+def source_fingerprint(translations_dir: str = TRANSLATIONS_DIR) -> Dict[str, str]:
+    """
+    Hashes the translation sources so a stale catalog can be detected.
+
+    Returns:
+        dict: YAML file name mapped to the SHA-1 of its content.
+    """
+    fingerprint = {}
+    for name in sorted(os.listdir(translations_dir)):
+        if name.endswith(".yaml"):
+            with open(os.path.join(translations_dir, name), "rb") as f:
+                fingerprint[name] = hashlib.sha1(f.read()).hexdigest()
+    return fingerprint
+
+def _field_count(key: str, text: str) -> int:
+    """Counts the positional fields of a template, rejecting ones messenger can't fill."""
+    # Only needed when compiling, not when loading a compiled catalog
+    import string
+    count = 0
+    for _, field, spec, conversion in string.Formatter().parse(text):
+        if field is None:
+            continue
+        if field not in ("", str(count)) or spec or conversion:
+            raise ValueError(f'Unsupported placeholder "{{{field}}}" in translation "{key}"')
+        count += 1
+    return count
+
+def compile_catalog(translations_dir: str = TRANSLATIONS_DIR, strict: bool = False) -> dict:
+    """
+    Parses every translation file and checks the fields of its templates.
+
+    Args:
+        translations_dir (str): Directory holding the <lang>.yaml files.
+        strict (bool): Raise on a placeholder messenger can't fill (the
+            build step). Otherwise the error is logged and the text keeps
+            a plain str.format, which fails for that key only, at runtime.
+
+    Returns:
+        dict: The catalog: source fingerprint, then per language its texts
+            and the number of fields of every text that is a template
+            (None for one that failed the check).
+
+    Raises:
+        ValueError: If strict and a text has an unsupported placeholder.
+    """
+    from utils.reader import load_translations
+    fingerprint = source_fingerprint(translations_dir)
+    languages = {}
+    for name in fingerprint:
+        lang = name[:-len(".yaml")]
+        texts = {key: str(text) for key, text in load_translations(lang, translations_dir).items()}
+        fields = {}
+        for key, text in texts.items():
+            try:
+                count = _field_count(key, text)
+            except ValueError as e:
+                if strict:
+                    raise
+                logger.error(f"{name}: {e}")
+                count = None
+            if count != 0:
+                fields[key] = count
+        languages[lang] = {"strings": texts, "fields": fields}
+    return {"format": CATALOG_FORMAT, "sources": fingerprint, "languages": languages}
+
+def write_catalog(catalog: dict, path: str = TRANSLATIONS_CATALOG):
+    """Writes a compiled catalog atomically."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporary, path)
+
+def _read_catalog(path: str, fingerprint: Dict[str, str]) -> Optional[dict]:
+    """Returns the catalog at path if it was compiled from the current sources."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if catalog.get("format") != CATALOG_FORMAT or catalog.get("sources") != fingerprint:
+        return None
+    return catalog
+
+def load_catalog_data(translations_dir: str = TRANSLATIONS_DIR, path: str = TRANSLATIONS_CATALOG) -> dict:
+    """
+    Returns the compiled catalog, recompiling it when the sources changed.
+
+    The recompiled catalog is written back so the next start loads it
+    directly; if the directory is read-only it is simply kept in memory.
+    """
+    fingerprint = source_fingerprint(translations_dir)
+    catalog = _read_catalog(path, fingerprint)
+    if catalog is not None:
+        return catalog
+
+    logger.info("Translation catalog missing or outdated, compiling it from the YAML files.")
+    catalog = compile_catalog(translations_dir)
+    try:
+        write_catalog(catalog, path)
+    except OSError as e:
+        logger.debug(f"Could not write translation catalog {path}: {e}")
+    return catalog
+
+class TranslationCatalog:
+    """
+    Every language's texts in memory, with one of them active.
+
+    ``strings`` holds the active language's texts and is updated in place
+    (it is constants.project.TRANSLATIONS); ``formatters`` maps each
+    template key to its bound ``str.format``. Switching languages swaps
+    both without reading or checking any file.
+    """
+
+    def __init__(self, data: dict):
+        self.strings = {}
+        self.formatters = {}
+        self.language = None
+        self._lock = threading.Lock()
+        self.load(data)
+
+    def load(self, data: dict):
+        """Replaces the compiled languages, e.g. after the sources changed."""
+        with self._lock:
+            self.languages = data["languages"]
+            self._formatters_by_language = {}
+            self.sources = data["sources"]
+        if self.language in self.languages:
+            self.set_language(self.language)
+
+    def _build_formatters(self, lang: str) -> dict:
+        """Binds the templates' str.format; each call still parses its template, which is cheap for these short texts."""
+        texts = self.languages[lang]
+        return {key: texts["strings"][key].format for key in texts["fields"]}
+
+    def set_language(self, lang: str):
+        """
+        Makes a language active.
+
+        Raises:
+            KeyError: If there is no translation file for the language.
+        """
+        with self._lock:
+            texts = self.languages[lang]["strings"]
+            formatters = self._formatters_by_language.get(lang)
+            if formatters is None:
+                formatters = self._formatters_by_language[lang] = self._build_formatters(lang)
+            # Overwrite before dropping stale keys so readers never see a missing key
+            self.strings.update(texts)
+            for key in self.strings.keys() - texts.keys():
+                del self.strings[key]
+            self.formatters = formatters
+            self.language = lang
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> TranslationCatalog:
+    """Returns the process-wide translation catalog, loading it on first use."""
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = TranslationCatalog(load_catalog_data())
+    return _catalog
+
+def refresh_catalog():
+    """Reloads the catalog if a translation file changed since it was loaded."""
+    catalog = get_catalog()
+    if source_fingerprint() != catalog.sources:
+        catalog.load(load_catalog_data())
+
+def main():
+    """Build step: compiles translations/*.yaml into the catalog shipped with the app."""
+    logging.basicConfig(level=logging.INFO)
+    catalog = compile_catalog(strict=True)
+    write_catalog(catalog)
+    print(f"Wrote {TRANSLATIONS_CATALOG} ({', '.join(catalog['languages'])})")
+
+if __name__ == "__main__":
+    main()